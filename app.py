@@ -1,34 +1,63 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, g
 from flask_cors import CORS
 import pickle
 import numpy as np
 import random
 import os
-import glob
+import time
 from nasa_scraper import NASAExoplanetScraper
 from web3_integration import FilecoinNFTMinter
-from planet_visualizer import PlanetVisualizer
+from planet_visualizer import PlanetVisualizer, planet_image_filename
 from ipfs_uploader import IPFSUploader
+from image_index import PlanetImageIndex
+from image_derivatives import ImageDerivatives
+from mint_jobs import MintJobQueue
+from token_snapshot import TokenSnapshotCache
+from planet_query import PlanetQuery
+from similar_planets import SimilarPlanetsCache
+from exoplanet_classifier import ExoplanetClassifier, MicroBatchingClassifier, ModelUnavailableError
+from funding_indexer import FundingIndexer
+from metrics import metrics
+from concurrent.futures import ThreadPoolExecutor
 
 app = Flask(__name__)
 CORS(app)
 
 # Initialize components
-scraper = NASAExoplanetScraper()
-minter = FilecoinNFTMinter()
-visualizer = PlanetVisualizer(size=512)
-ipfs = IPFSUploader(service='pinata')
+# Catalog is cached on disk and refreshed in the background every CATALOG_TTL seconds
+scraper = NASAExoplanetScraper(
+    cache_path=os.environ.get('CATALOG_CACHE_PATH', 'data/catalog.npz'),
+    ttl=int(os.environ.get('CATALOG_TTL', 6 * 3600))
+)
+# Sends real mintBatch transactions only when a deployed contract and a signing key are configured
+minter = FilecoinNFTMinter(
+    contract_address=os.environ.get('SPACE_TOKENS_CONTRACT'),
+    private_key=os.environ.get('MINTER_PRIVATE_KEY')
+)
+visualizer = PlanetVisualizer(
+    size=512,
+    backend=os.environ.get('RENDER_BACKEND', 'pil'),
+    cache_dir=os.environ.get('RENDER_CACHE_DIR', 'data/renders')
+)
+ipfs = IPFSUploader(service='pinata', cid_cache_path=os.environ.get('IPFS_CID_CACHE', 'data/ipfs_cids.json'))
 
 os.makedirs('static/planets', exist_ok=True)
 
-# Simulated AI model (replace with real trained model)
-class ExoplanetClassifier:
-    def predict(self, features):
-        # Simulate prediction based on features
-        score = random.uniform(0.7, 0.99)
-        return score > 0.85, score
+# Trained on KOI dispositions; loaded on first use, or trained from the catalog if no model is saved yet
+model = ExoplanetClassifier(
+    model_path=os.environ.get('CLASSIFIER_MODEL_PATH', 'data/classifier.joblib'),
+    catalog=scraper.get_catalog
+)
+# Optional dynamic batching of concurrent single-row /api/classify calls
+if os.environ.get('CLASSIFY_BATCHING', '0') in ('1', 'true'):
+    model = MicroBatchingClassifier(
+        model,
+        max_batch=int(os.environ.get('CLASSIFY_MAX_BATCH', 64)),
+        max_latency=float(os.environ.get('CLASSIFY_MAX_LATENCY_MS', 2)) / 1000
+    )
 
-model = ExoplanetClassifier()
+# Index of planet images in static/planets/, rebuilt when the directory changes
+image_index = PlanetImageIndex('static/planets')
 
 # Function to check if a planet image exists in static/planets/
 def get_existing_planet_image(planet_name):
@@ -36,37 +65,25 @@ def get_existing_planet_image(planet_name):
     Check if there's an existing JPG image for a planet in static/planets/
     Returns the path if found, None otherwise
     """
-    planets_dir = 'static/planets'
-    
-    # Clean planet name for filename matching
-    clean_name = planet_name.replace(' ', '').replace('-', '').replace('_', '').lower()
-    
-    # Look for JPG files in the planets directory
-    jpg_files = glob.glob(os.path.join(planets_dir, '*.jpg'))
-    
-    # Priority matching: exact match first, then partial matches
-    exact_matches = []
-    partial_matches = []
-    
-    for jpg_file in jpg_files:
-        # Get filename without extension and path
-        filename = os.path.splitext(os.path.basename(jpg_file))[0]
-        clean_filename = filename.replace('_', '').replace('-', '').lower()
-        
-        # Exact match (highest priority)
-        if clean_name == clean_filename:
-            exact_matches.append(jpg_file)
-        # Partial match (lower priority)
-        elif clean_name in clean_filename or clean_filename in clean_name:
-            partial_matches.append(jpg_file)
-    
-    # Return exact match first, then partial match
-    if exact_matches:
-        return f'/static/planets/{os.path.basename(exact_matches[0])}'
-    elif partial_matches:
-        return f'/static/planets/{os.path.basename(partial_matches[0])}'
-    
-    return None
+    with metrics.timed('image_lookup'):
+        return image_index.find(planet_name)
+
+# KD-tree of planet features for /api/planets/<name>/similar, rebuilt per catalog
+similar_planets = SimilarPlanetsCache(scraper)
+
+# Funding totals indexed from the contract's events (only when SPACE_TOKENS_CONTRACT is set)
+funding_indexer = FundingIndexer(
+    minter,
+    checkpoint_path=os.environ.get('FUNDING_INDEX_PATH', 'data/funding_index.json'),
+    start_block=int(os.environ.get('FUNDING_START_BLOCK', 0)),
+    poll_interval=int(os.environ.get('FUNDING_POLL_INTERVAL', 30))
+)
+
+# Thumbnails and WebP/AVIF/JPEG variants of the planet images, in static/planets/derived/
+derivatives = ImageDerivatives('static/planets')
+
+# /api/tokens payload, rebuilt when the catalog, the planet images or the funding totals change
+token_snapshots = TokenSnapshotCache(scraper, minter, image_index, funding_indexer, derivatives)
 
 # Token rarity calculation
 def calculate_rarity(radius, period, temp):
@@ -78,21 +95,72 @@ def calculate_rarity(radius, period, temp):
         return "Uncommon"
     return "Common"
 
+# Per-stage timings of each request in a Server-Timing header, for browser dev tools
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '0') in ('1', 'true')
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.start_request()
+
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.request_start
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe('http_request_duration_seconds', elapsed,
+                    route=route, method=request.method, status=response.status_code)
+    if SERVER_TIMING:
+        spans = metrics.server_timing()
+        response.headers['Server-Timing'] = ', '.join(filter(None, [spans, f'total;dur={elapsed * 1000:.1f}']))
+    return response
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def classifier_unavailable(error):
+    # No saved model and an empty catalog (e.g. NASA unreachable on first boot); retried on the next request
+    print(f"Classifier unavailable: {error}")
+    return jsonify({'success': False, 'message': 'Classifier not available yet, try again later'}), 503
+
 @app.route('/api/classify', methods=['POST'])
 def classify():
     data = request.json
     
+    # Batch form: {"rows": [[period, radius, temp], ...]} scored in one vectorized call
+    if 'rows' in data:
+        try:
+            rows = np.asarray(data['rows'], dtype=np.float64)
+        except (TypeError, ValueError):
+            rows = None
+        if rows is None or rows.ndim != 2 or rows.shape[1] != 3 or not np.isfinite(rows).all():
+            return jsonify({'success': False, 'message': 'rows must be a list of [period, radius, temp]'}), 400
+        if len(rows) > 10000:
+            return jsonify({'success': False, 'message': 'At most 10000 rows per request'}), 400
+        
+        try:
+            is_candidate, scores = model.predict_batch(rows)
+        except ModelUnavailableError as e:
+            return classifier_unavailable(e)
+        return jsonify({
+            'success': True,
+            'count': len(rows),
+            'results': [
+                {'is_candidate': bool(candidate), 'confidence': round(float(score) * 100, 2)}
+                for candidate, score in zip(is_candidate, scores)
+            ]
+        })
+    
     # Extract features
     period = float(data.get('period', 365))
     radius = float(data.get('radius', 1.0))
     temp = float(data.get('temp', 5778))
     
     # Predict
-    is_candidate, confidence = model.predict([period, radius, temp])
+    try:
+        is_candidate, confidence = model.predict([period, radius, temp])
+    except ModelUnavailableError as e:
+        return classifier_unavailable(e)
     
     if is_candidate:
         # Generate token metadata
@@ -113,45 +181,38 @@ def classify():
 
 @app.route('/api/tokens')
 def get_tokens():
-    # Fetch real exoplanet data from NASA
+    # Served from a snapshot built once per catalog refresh (and image directory change)
+    sort = request.args.get('sort', '')
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+    # Variants missing on disk are generated once per process; the snapshot picks them up when written
+    derivatives.generate_in_background()
     try:
-        planets = scraper.fetch_exoplanets(10)
-        tokens = []
-        
-        for planet in planets:
-            habitability = scraper.calculate_habitability_score(planet)
-            rarity = scraper.classify_rarity(habitability)
-            
-            # Check if there's an existing image for this planet
-            existing_image = get_existing_planet_image(planet['name'])
-            
-            token_data = {
-                'id': f"EXO-{minter.generate_token_id(planet['name']) % 10000}",
-                'name': planet['name'],
-                'rarity': rarity,
-                'confidence': habitability,
-                'period': planet['orbital_period'],
-                'radius': planet['radius'],
-                'temp': planet['star_temp'],
-                'fundingGoal': random.randint(10000, 50000),
-                'currentFunding': random.randint(0, 30000),
-                'discoveryYear': planet['discovery_year'],
-                'hostStar': planet['host_star']
-            }
-            
-            # Add existing image path if found
-            if existing_image:
-                token_data['local_image'] = existing_image
-                print(f"✅ Using existing image for {planet['name']}: {existing_image}")
-            
-            tokens.append(token_data)
-        
-        return jsonify(tokens)
-    except:
+        snapshot = token_snapshots.get()
+    except Exception:
         # Fallback to sample data
         return jsonify([
             {'id': 'EXO-1001', 'name': 'Kepler-442b', 'rarity': 'Ultra Rare', 'confidence': 95.8, 'period': 112.3, 'radius': 1.34, 'temp': 4402, 'fundingGoal': 25000, 'currentFunding': 18500}
         ])
+    
+    try:
+        body, gzip_body, etag = snapshot.page(sort, page, min(per_page, 500))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    # Pre-compressed variant for clients that accept gzip; each encoding has its own ETag
+    if 'gzip' in request.accept_encodings:
+        response = app.response_class(gzip_body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        etag = f'{etag}-gzip'
+    else:
+        response = app.response_class(body, mimetype='application/json')
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['X-Total-Count'] = str(len(snapshot))
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    response.set_etag(etag)
+    response.last_modified = snapshot.last_modified
+    return response.make_conditional(request)
 
 @app.route('/api/fund', methods=['POST'])
 def fund():
@@ -170,46 +231,67 @@ def fund():
         'explorer': f'https://calibration.filfox.info/en/message/{tx_hash}'
     })
 
-@app.route('/api/mint', methods=['POST'])
-def mint_token():
-    data = request.json
-    planet_name = data.get('planetName')
-    owner_address = data.get('ownerAddress', '0x0000000000000000000000000000000000000000')
-    
-    # Fetch planet data
-    planets = scraper.fetch_exoplanets(100)
-    planet_data = next((p for p in planets if p['name'] == planet_name), None)
-    
-    if not planet_data:
-        return jsonify({'success': False, 'message': 'Planet not found'})
+@app.route('/api/funding', methods=['GET'])
+def get_funding():
+    """Funding received per planet (FIL), read from the local event index"""
+    totals = funding_indexer.totals()
+    if totals is None:
+        return jsonify({'success': False, 'message': 'No contract configured'}), 404
+    return jsonify({
+        'success': True,
+        'last_block': funding_indexer.last_block,
+        'count': len(totals),
+        'funding': totals
+    })
+
+def run_mint(job, planet_data, owner_address):
+    """Mint pipeline run by the job queue: image, IPFS uploads and the mint transaction"""
+    planet_name = planet_data['name']
     
-    # Calculate habitability and rarity
-    habitability = scraper.calculate_habitability_score(planet_data)
-    planet_data['habitability_score'] = habitability
-    planet_data['rarity'] = scraper.classify_rarity(habitability)
+    # Habitability and rarity come precomputed with the catalog
+    habitability = planet_data['habitability_score']
     
     # Check if there's an existing image for this planet
-    existing_image = get_existing_planet_image(planet_name)
+    with job.stage('image_lookup'):
+        existing_image = get_existing_planet_image(planet_name)
     
     if existing_image:
         # Use existing image
         print(f"✅ Using existing image for {planet_name}: {existing_image}")
         img_filename = os.path.basename(existing_image)
-        img_path = f"static/planets/{img_filename}"
         image_uri = existing_image  # Use local path for existing images
-        planet_img = None  # No need to generate new image
     else:
-        # Generate new planet image
-        planet_img = visualizer.generate_planet_image({
-            'st_teff': planet_data['star_temp'],
-            'pl_rade': planet_data['radius']
-        })
-        
-        # Save and upload to IPFS
-        img_filename = f"{planet_name.replace(' ', '_')}.png"
+        img_filename = planet_image_filename(planet_name)
         img_path = f"static/planets/{img_filename}"
-        visualizer.save_image(planet_img, img_path)
-        image_uri = ipfs.upload_image(planet_img, img_filename)
+        saved = None
+        
+        if os.path.exists(img_path):
+            # Pre-rendered offline with `python planet_visualizer.py`
+            with job.stage('load_image'):
+                with open(img_path, 'rb') as f:
+                    planet_png = f.read()
+        else:
+            # Generate new planet image (served from the render cache when possible)
+            with job.stage('render'):
+                planet_png = visualizer.generate_planet_png({
+                    'pl_name': planet_name,
+                    'st_teff': planet_data['star_temp'],
+                    'pl_rade': planet_data['radius']
+                })
+            
+            # Writing the PNG locally and pinning it to IPFS are independent
+            def save_image():
+                with job.stage('save_image'):
+                    visualizer.save_png(planet_png, img_path)
+                with job.stage('derivatives'):
+                    derivatives.generate(img_filename)
+            saved = mint_io.submit(save_image)
+        
+        # Upload to IPFS
+        with job.stage('upload_image'):
+            image_uri = ipfs.upload_image(planet_png, img_filename)
+        if saved:
+            saved.result()
     
     # Create metadata
     metadata = {
@@ -224,49 +306,149 @@ def mint_token():
             {'trait_type': 'Star Temp', 'value': f"{planet_data['star_temp']} K"}
         ]
     }
-    metadata_uri = ipfs.upload_metadata(metadata)
+    with job.stage('upload_metadata'):
+        metadata_uri = ipfs.upload_metadata(metadata)
     
-    # Mint NFT
-    result = minter.mint_nft(planet_data, owner_address, metadata_uri)
+    # Mint NFT; the job already runs in the background, so it waits for the receipt and its token id
+    with job.stage('mint'):
+        result = minter.mint_nft(planet_data, owner_address, metadata_uri, wait=True)
     result['image_uri'] = image_uri
     result['metadata_uri'] = metadata_uri
     result['local_image'] = f'/static/planets/{img_filename}'
+    result['srcset'] = derivatives.srcset(img_filename)
     
-    return jsonify(result)
+    return result
+
+# Mint jobs run in the background; POST /api/mint only validates and enqueues
+mint_jobs = MintJobQueue(run_mint, workers=int(os.environ.get('MINT_WORKERS', 4)))
+mint_io = ThreadPoolExecutor(max_workers=4, thread_name_prefix='mint-io')
+
+@app.route('/api/mint', methods=['POST'])
+def mint_token():
+    data = request.json
+    planet_name = data.get('planetName')
+    owner_address = data.get('ownerAddress', '0x0000000000000000000000000000000000000000')
+    
+    # Look up planet data in the cached catalog index
+    planet_data = scraper.get_planet(planet_name)
+    
+    if not planet_data:
+        return jsonify({'success': False, 'message': 'Planet not found'})
+    
+    # Mints of the same planet run one after another: the second one reuses the image the first one wrote
+    job = mint_jobs.submit(key=planet_data['name'], planet_data=planet_data, owner_address=owner_address)
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/api/mint/{job.id}'
+    }), 202
+
+@app.route('/api/mint/<job_id>', methods=['GET'])
+def mint_status(job_id):
+    job = mint_jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    return jsonify({'success': True, **job.to_dict()})
 
 @app.route('/api/nasa/fetch', methods=['GET'])
 def fetch_nasa_data():
     limit = request.args.get('limit', 20, type=int)
-    planets = scraper.fetch_exoplanets(limit)
+    # live=1 bypasses the cache and streams only the first `limit` rows from NASA
+    live = request.args.get('live', '0') in ('1', 'true')
+    planets = scraper.fetch_exoplanets(limit, stream=live)
     return jsonify({'success': True, 'count': len(planets), 'planets': planets})
 
+@app.route('/api/planets', methods=['GET'])
+def query_planets():
+    """Filter and rank the cached catalog, e.g. ?radius_lt=2&teq_between=200,350&sort=-habitability&page=3"""
+    try:
+        query = PlanetQuery.from_args(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    total, planets = scraper.query_planets(query)
+    return jsonify({
+        'success': True,
+        'total': total,
+        'page': query.page,
+        'per_page': query.per_page,
+        'count': len(planets),
+        'planets': planets
+    })
+
+@app.route('/api/planets/<path:planet_name>/similar', methods=['GET'])
+def get_similar_planets(planet_name):
+    """Nearest planets by radius, period, equilibrium temp, star temp and KOI score"""
+    k = request.args.get('k', 10, type=int)
+    if k < 1 or k > 100:
+        return jsonify({'success': False, 'message': 'k must be between 1 and 100'}), 400
+    
+    planets = similar_planets.similar_planets(planet_name, k)
+    if planets is None:
+        return jsonify({'success': False, 'message': 'Planet not found'}), 404
+    return jsonify({'success': True, 'planet': planet_name, 'count': len(planets), 'planets': planets})
+
 @app.route('/api/planet-images', methods=['GET'])
 def get_planet_images():
     """Get list of available planet images in static/planets/"""
-    planets_dir = 'static/planets'
-    jpg_files = glob.glob(os.path.join(planets_dir, '*.jpg'))
-    
-    images = []
-    for jpg_file in jpg_files:
-        filename = os.path.basename(jpg_file)
-        images.append({
-            'filename': filename,
-            'path': f'/static/planets/{filename}',
-            'clean_name': filename.replace('_', '').replace('-', '').lower().replace('.jpg', '')
-        })
-    
+    images = image_index.images()
     return jsonify({'success': True, 'images': images, 'count': len(images)})
 
+def preview_planet_data(params):
+    """Visualizer input from the temp/radius preview parameters, or None if they are not valid"""
+    try:
+        temp = float(params.get('temp', 5778))
+        radius = float(params.get('radius', 1.0))
+    except (TypeError, ValueError):
+        return None
+    if not (np.isfinite(temp) and np.isfinite(radius)) or radius <= 0:
+        return None
+    return {'st_teff': temp, 'pl_rade': radius}
+
+def invalid_preview():
+    return jsonify({'success': False, 'message': 'temp and radius must be finite numbers, with radius > 0'}), 400
+
 @app.route('/api/preview', methods=['POST'])
 def preview_planet():
+    """Same PNG as /api/preview.png, base64-encoded in JSON for existing clients"""
     data = request.json
-    planet_img = visualizer.generate_planet_image({
-        'st_teff': data.get('temp', 5778),
-        'pl_rade': data.get('radius', 1.0)
-    })
-    img_base64 = visualizer.image_to_base64(planet_img)
+    planet_data = preview_planet_data(data) if isinstance(data, dict) else None
+    if planet_data is None:
+        return invalid_preview()
+    img_base64 = visualizer.generate_planet_base64(planet_data)
     return jsonify({'image': f'data:image/png;base64,{img_base64}'})
 
+def preview_response(fmt):
+    """Encoded preview bytes sent as they are in the render cache, with HTTP caching headers"""
+    planet_data = preview_planet_data(request.args)
+    if planet_data is None:
+        return invalid_preview()
+    if fmt == 'png':
+        body = visualizer.generate_planet_png(planet_data)
+    else:
+        body = visualizer.generate_planet_encoded(planet_data, fmt)
+    response = app.response_class(body, mimetype=f'image/{fmt}')
+    # Same parameters always render the same image
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    response.set_etag(f'{visualizer.render_key(planet_data)}-{fmt}')
+    return response.make_conditional(request)
+
+@app.route('/api/preview.png', methods=['GET'])
+def preview_planet_png():
+    """Binary PNG preview, e.g. /api/preview.png?temp=5778&radius=1.0"""
+    return preview_response('png')
+
+@app.route('/api/preview.webp', methods=['GET'])
+def preview_planet_webp():
+    """Binary WebP preview, e.g. /api/preview.webp?temp=5778&radius=1.0"""
+    return preview_response('webp')
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Stage and route latency histograms, cache lookups and upstream errors (Prometheus text format)"""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     print("🚀 Space Tokens - NASA Exoplanet NFTs")
     print("🌍 http://localhost:5000")
@@ -0,0 +1,314 @@
+"""
+Benchmarks for the scraper, scoring, renderer, uploader and API routes, run against local
+replays of NASA and Pinata. Prints (or writes) JSON with p50/p99 latency and throughput.
+    
+    python benchmarks/run.py [--quick] [--only render] [--output results.json]
+    python benchmarks/run.py --baseline previous.json     # exit 1 on p50 regressions
+    python benchmarks/run.py --record                     # save a live NASA response as the fixture
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from servers import synthetic_cumulative_csv, nasa_replay_server, fake_pinning_server
+
+# Recorded archive response, replayed when present (see --record)
+FIXTURE_PATH = os.path.join(BENCHMARKS_DIR, 'fixtures', 'cumulative.csv')
+
+RENDER_SIZES = (256, 512, 1024)
+
+def measure(name, function, iterations, warmup=1, items=1):
+    """Run `function` repeatedly; latency percentiles per call and throughput in calls (or items) per second"""
+    for _ in range(warmup):
+        function()
+    latencies = np.empty(iterations)
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        function()
+        latencies[i] = time.perf_counter() - call_start
+    total = time.perf_counter() - start
+    result = {
+        'name': name,
+        'iterations': iterations,
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+        'mean_ms': round(float(latencies.mean()) * 1000, 3),
+        'throughput_per_s': round(iterations / total, 2)
+    }
+    if items > 1:
+        result['items_per_call'] = items
+        result['items_per_s'] = round(iterations * items / total, 1)
+    print(f"  {name:<60} p50 {result['p50_ms']:>9.3f} ms   p99 {result['p99_ms']:>9.3f} ms", file=sys.stderr)
+    return result
+
+def load_fixture():
+    if os.path.exists(FIXTURE_PATH):
+        with open(FIXTURE_PATH, 'rb') as f:
+            return f.read(), 'recorded'
+    return synthetic_cumulative_csv(), 'synthetic'
+
+def record_fixture():
+    """Download the live 'cumulative' table once and keep it as the replayed fixture"""
+    from nasa_scraper import NASAExoplanetScraper
+    with NASAExoplanetScraper(cache_path=None)._open_archive() as response:
+        response.raise_for_status()
+        body = response.content
+    os.makedirs(os.path.dirname(FIXTURE_PATH), exist_ok=True)
+    with open(FIXTURE_PATH, 'wb') as f:
+        f.write(body)
+    print(f"✅ {len(body)} bytes recorded to {FIXTURE_PATH}", file=sys.stderr)
+
+def bench_scraper(nasa_url, scale):
+    from nasa_scraper import NASAExoplanetScraper
+    scraper = NASAExoplanetScraper(cache_path=None)
+    scraper.base_url = nasa_url
+    rows = len(scraper._download_catalog())
+    return [
+        # Download, streamed CSV parse, columns, scoring and indexes of the full table
+        measure('scraper.download_catalog', lambda: scraper._download_catalog(), 5 * scale, items=rows),
+        measure('scraper.fetch_exoplanets(stream=True)', lambda: scraper.fetch_exoplanets(limit=None, stream=True),
+                5 * scale, items=rows),
+        measure('scraper.fetch_exoplanets(limit=100)', lambda: scraper.fetch_exoplanets(limit=100), 200 * scale)
+    ]
+
+def bench_scoring(nasa_url, scale):
+    from nasa_scraper import NASAExoplanetScraper, habitability_scores
+    scraper = NASAExoplanetScraper(cache_path=None)
+    scraper.base_url = nasa_url
+    catalog = scraper.get_catalog()
+    planets = catalog.planets
+    columns = [catalog.columns[name] for name in ('radius', 'equilibrium_temp', 'orbital_period', 'star_temp', 'koi_score')]
+    return [
+        measure('calculate_habitability_score (all rows)',
+                lambda: [scraper.calculate_habitability_score(planet) for planet in planets], 10 * scale, items=len(planets)),
+        measure('habitability_scores (vectorized)', lambda: habitability_scores(*columns), 100 * scale, items=len(planets))
+    ]
+
+def bench_render(scale):
+    from planet_visualizer import PlanetVisualizer
+    planets = [{'st_teff': temp, 'pl_rade': radius} for temp, radius in ((3200, 0.6), (4500, 1.0), (5778, 1.4), (8000, 2.2))]
+    results = []
+    for backend in PlanetVisualizer.BACKENDS:
+        for size in RENDER_SIZES:
+            visualizer = PlanetVisualizer(size=size, backend=backend, cache_size=0)
+            counter = iter(range(10 ** 9))
+            results.append(measure(
+                f'generate_planet_image[{backend},{size}]',
+                lambda: visualizer.generate_planet_image(planets[next(counter) % len(planets)]),
+                max(3, 20 * scale * 512 // size)
+            ))
+    visualizer = PlanetVisualizer(size=512)
+    img = visualizer.generate_planet_image(planets[2])
+    results.append(measure('image_to_png[512]', lambda: visualizer.image_to_png(img), 20 * scale))
+    results.append(measure('image_to_base64[512]', lambda: visualizer.image_to_base64(img), 20 * scale))
+    return results
+
+def bench_uploads(pinata_url, scale):
+    from http_session import HTTPClient
+    from ipfs_uploader import IPFSUploader
+    from planet_visualizer import PlanetVisualizer
+    uploader = IPFSUploader(service='pinata', api_key='bench', api_secret='bench', http=HTTPClient(retries=0))
+    uploader.upload_url = f'{pinata_url}/pinning/pinFileToIPFS'
+    uploader.json_url = f'{pinata_url}/pinning/pinJSONToIPFS'
+    
+    visualizer = PlanetVisualizer(size=512)
+    images = [visualizer.generate_planet_png({'st_teff': 3000 + 250 * i, 'pl_rade': 0.5 + 0.1 * i}) for i in range(16)]
+    metadata = {'name': 'Kepler-22 b', 'description': 'Exoplanet with 80% habitability score',
+                'image': 'ipfs://Qm', 'attributes': [{'trait_type': 'Rarity', 'value': 'Ultra Rare'}]}
+    
+    def uncached(function):
+        # The CID cache would answer every repeat without a request
+        def run():
+            uploader._cids.clear()
+            function()
+        return run
+    
+    return [
+        measure('ipfs.upload_image[512px png]', uncached(lambda: uploader.upload_image(images[0], 'planet.png')), 50 * scale),
+        measure('ipfs.upload_metadata', uncached(lambda: uploader.upload_metadata(metadata)), 50 * scale),
+        measure('ipfs.upload_many[16 images]', uncached(lambda: uploader.upload_many([(png, f'{i}.png') for i, png in enumerate(images)])),
+                10 * scale, items=len(images)),
+        measure('ipfs.upload_image (CID cache hit)', lambda: uploader.upload_image(images[0], 'planet.png'), 200 * scale)
+    ]
+
+def bench_routes(nasa_url, pinata_url, workdir, scale):
+    # app reads its configuration from the environment at import time
+    os.environ.update({
+        'CATALOG_CACHE_PATH': os.path.join(workdir, 'catalog.npz'),
+        'RENDER_CACHE_DIR': os.path.join(workdir, 'renders'),
+        'IPFS_CID_CACHE': os.path.join(workdir, 'ipfs_cids.json'),
+        'CLASSIFIER_MODEL_PATH': os.path.join(workdir, 'classifier.joblib'),
+        'FUNDING_INDEX_PATH': os.path.join(workdir, 'funding_index.json')
+    })
+    # Mints stay simulated (no chain is contacted) even if a contract is configured
+    for variable in ('SPACE_TOKENS_CONTRACT', 'MINTER_PRIVATE_KEY'):
+        os.environ.pop(variable, None)
+    
+    # The app's relative paths (static/planets, its derived variants, minted images) resolve inside
+    # workdir, on a copy of the planet images, so nothing is written to the repository
+    shutil.copytree(os.path.join(REPO_ROOT, 'static', 'planets'), os.path.join(workdir, 'static', 'planets'),
+                    ignore=shutil.ignore_patterns('derived'))
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        return _bench_routes(nasa_url, pinata_url, scale)
+    finally:
+        os.chdir(previous_cwd)
+
+def _bench_routes(nasa_url, pinata_url, scale):
+    import app as app_module
+    # Encoded up front: otherwise /api/tokens starts encoding them in the background during the run
+    app_module.derivatives.generate_all()
+    
+    app_module.scraper.base_url = nasa_url
+    app_module.ipfs.upload_url = f'{pinata_url}/pinning/pinFileToIPFS'
+    app_module.ipfs.json_url = f'{pinata_url}/pinning/pinJSONToIPFS'
+    client = app_module.app.test_client()
+    name = app_module.scraper.get_catalog().planets[0]['name']
+    
+    def request(method, url, body=None):
+        response = client.open(url, method=method, json=body)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} -> {response.status_code}")
+        return response.get_json(silent=True)
+    
+    routes = [
+        ('GET', '/api/tokens?per_page=50', None),
+        ('GET', '/api/tokens?per_page=50&sort=-confidence&page=3', None),
+        ('GET', '/api/planets?radius_lt=2&teq_between=200,350&sort=-habitability', None),
+        ('GET', f'/api/planets/{name}/similar?k=10', None),
+        ('GET', '/api/nasa/fetch?limit=20', None),
+        ('POST', '/api/classify', {'period': 365, 'radius': 1.0, 'temp': 5778}),
+        ('GET', '/api/preview.png?temp=5778&radius=1.0', None),
+        ('POST', '/api/preview', {'temp': 5778, 'radius': 1.0}),
+        ('GET', '/metrics', None)
+    ]
+    results = []
+    for method, url, body in routes:
+        def call():
+            request(method, url, body)
+        results.append(measure(f'{method} {url}', call, 100 * scale, warmup=2))
+    
+    # Async mint path: enqueue, poll the status, and the whole pipeline until the job is done
+    mint_body = {'planetName': name, 'ownerAddress': '0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb0'}
+    
+    def mint():
+        return request('POST', '/api/mint', mint_body)['status_url']
+    
+    def mint_until_done():
+        status_url = mint()
+        while True:
+            job = request('GET', status_url)
+            if job['status'] == 'failed':
+                raise RuntimeError(f"mint job failed: {job['error']}")
+            if job['status'] == 'done':
+                return
+            time.sleep(0.001)
+    
+    # The first mint renders and pins the image; the measured ones reuse it, like repeated mints do
+    results.append(measure('mint job (POST /api/mint until done)', mint_until_done, 20 * scale, warmup=2))
+    results.append(measure('POST /api/mint', mint, 100 * scale, warmup=2))
+    # Same planet: the enqueued jobs run one after another; let them finish before polling a done job
+    status_url = mint()
+    while request('GET', status_url)['status'] != 'done':
+        time.sleep(0.01)
+    results.append(measure('GET /api/mint/<job_id>', lambda: request('GET', status_url), 100 * scale, warmup=2))
+    return results
+
+def compare(results, baseline_path, threshold):
+    """Benchmarks whose p50 grew by more than `threshold` (a ratio) against a previous run"""
+    with open(baseline_path) as f:
+        baseline = {result['name']: result for result in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['name'])
+        if previous and previous['p50_ms'] > 0 and result['p50_ms'] / previous['p50_ms'] > threshold:
+            regressions.append({'name': result['name'], 'baseline_p50_ms': previous['p50_ms'],
+                                'p50_ms': result['p50_ms'], 'ratio': round(result['p50_ms'] / previous['p50_ms'], 2)})
+    return regressions
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+GROUPS = ('scraper', 'scoring', 'render', 'uploads', 'routes')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SpaceTokens benchmarks (JSON on stdout)')
+    parser.add_argument('--quick', action='store_true', help='fewer iterations, for a smoke run')
+    parser.add_argument('--only', choices=GROUPS, action='append', help='run only these groups')
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    parser.add_argument('--baseline', help='previous results; exit 1 if a p50 regressed')
+    parser.add_argument('--threshold', type=float, default=1.25, help='p50 ratio counted as a regression')
+    parser.add_argument('--pin-latency-ms', type=float, default=0, help='simulated latency of the fake Pinata')
+    parser.add_argument('--record', action='store_true', help='record a live NASA response as the fixture and exit')
+    args = parser.parse_args()
+    
+    if args.record:
+        record_fixture()
+        sys.exit(0)
+    
+    scale = 1 if args.quick else 5
+    groups = args.only or GROUPS
+    fixture, fixture_source = load_fixture()
+    results = []
+    
+    with nasa_replay_server(fixture) as nasa, fake_pinning_server(args.pin_latency_ms / 1000) as pinata, \
+            tempfile.TemporaryDirectory() as workdir:
+        for group in groups:
+            print(f"▶ {group}", file=sys.stderr)
+            if group == 'scraper':
+                results += bench_scraper(nasa.url, scale)
+            elif group == 'scoring':
+                results += bench_scoring(nasa.url, scale)
+            elif group == 'render':
+                results += bench_render(scale)
+            elif group == 'uploads':
+                results += bench_uploads(pinata.url, scale)
+            elif group == 'routes':
+                results += bench_routes(nasa.url, pinata.url, workdir, scale)
+    
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'quick': args.quick,
+            'fixture': fixture_source,
+            'fixture_bytes': len(fixture),
+            'pin_latency_ms': args.pin_latency_ms
+        },
+        'results': results
+    }
+    if args.baseline:
+        report['regressions'] = compare(results, args.baseline, args.threshold)
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    
+    if report.get('regressions'):
+        for regression in report['regressions']:
+            print(f"❌ {regression['name']}: p50 {regression['baseline_p50_ms']} -> {regression['p50_ms']} ms "
+                  f"(x{regression['ratio']})", file=sys.stderr)
+        sys.exit(1)
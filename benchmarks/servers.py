@@ -0,0 +1,123 @@
+"""
+Local stand-ins for the external services, so benchmarks measure our code and not the network:
+a server replaying a NASA 'cumulative' CSV response and a fake Pinata pinning API.
+"""
+import csv
+import hashlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Same columns, in the same order, as nasa_scraper requests from the archive
+CUMULATIVE_COLUMNS = ('kepoi_name', 'kepler_name', 'koi_disposition', 'koi_period', 'koi_prad',
+                      'koi_teq', 'koi_steff', 'koi_srad', 'koi_slogg', 'koi_score')
+
+def synthetic_cumulative_csv(rows=9564, seed=0):
+    """
+    CSV in the layout of the archive's 'cumulative' table (about as many rows as the real one),
+    with blank cells and invalid rows like the real data. Used when no recorded response exists.
+    """
+    rng = np.random.default_rng(seed)
+    dispositions = rng.choice(['CONFIRMED', 'CANDIDATE', 'FALSE POSITIVE'], size=rows, p=[0.29, 0.2, 0.51])
+    period = np.round(np.exp(rng.normal(2.7, 1.4, rows)), 8)
+    radius = np.round(np.exp(rng.normal(0.9, 0.9, rows)), 2)
+    teq = np.round(np.exp(rng.normal(6.7, 0.5, rows)))
+    steff = np.round(rng.normal(5600, 800, rows))
+    srad = np.round(np.exp(rng.normal(0.0, 0.4, rows)), 3)
+    slogg = np.round(rng.normal(4.4, 0.3, rows), 3)
+    score = np.round(rng.uniform(0, 1, rows), 3)
+    # About 5% of the cells are missing, as in the archive
+    missing = rng.uniform(0, 1, (rows, 7)) < 0.05
+    
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(CUMULATIVE_COLUMNS)
+    for i in range(rows):
+        star = 10000 + i // 2
+        kepoi_name = f"K{star:05d}.{i % 2 + 1:02d}"
+        kepler_name = f"Kepler-{star - 9000} {'bc'[i % 2]}" if dispositions[i] == 'CONFIRMED' else ''
+        values = [period[i], radius[i], teq[i], steff[i], srad[i], slogg[i], score[i]]
+        values = ['' if missing[i, j] else repr(float(value)) for j, value in enumerate(values)]
+        writer.writerow([kepoi_name, kepler_name, dispositions[i]] + values)
+    return out.getvalue().encode()
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this each response waits on delayed ACKs
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        body, etag = self.server.body, self.server.etag
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+class _PinningHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this each response waits on delayed ACKs
+    disable_nagle_algorithm = True
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.path not in ('/pinning/pinFileToIPFS', '/pinning/pinJSONToIPFS'):
+            self.send_error(404)
+            return
+        with self.server.lock:
+            self.server.pinned += 1
+        response = json.dumps({
+            'IpfsHash': f"Qm{hashlib.sha256(body).hexdigest()[:44]}",
+            'PinSize': len(body),
+            'Timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+    
+    def log_message(self, format, *args):
+        pass
+
+class LocalServer:
+    """Runs an HTTP handler on a free localhost port in a daemon thread"""
+    
+    def __init__(self, handler, **attributes):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        for name, value in attributes.items():
+            setattr(self.httpd, name, value)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def nasa_replay_server(body):
+    """Serves `body` for any GET, answering If-None-Match with a 304 like the archive"""
+    return LocalServer(_ReplayHandler, body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:16]}"')
+
+def fake_pinning_server(latency=0.0):
+    """Pinata's pinFileToIPFS / pinJSONToIPFS, answering with a content-derived hash after `latency` seconds"""
+    return LocalServer(_PinningHandler, latency=latency, pinned=0, lock=threading.Lock())
@@ -16,6 +16,15 @@ contract SpaceTokens is ERC721URIStorage, Ownable {
         string rarity;
     }
     
+    struct MintRequest {
+        string planetName;
+        string hostStar;
+        string uri;
+        uint256 habitabilityScore;
+        uint256 fundingGoal;
+        string rarity;
+    }
+    
     mapping(uint256 => ExoplanetData) public exoplanets;
     
     event TokenMinted(uint256 indexed tokenId, string planetName, uint256 habitabilityScore);
@@ -32,6 +41,38 @@ contract SpaceTokens is ERC721URIStorage, Ownable {
         uint256 fundingGoal,
         string memory rarity
     ) public onlyOwner returns (uint256) {
+        return _mintExoplanet(to, planetName, hostStar, uri, habitabilityScore, fundingGoal, rarity);
+    }
+    
+    // Mints several exoplanets to the same owner in one transaction
+    function mintBatch(
+        address to,
+        MintRequest[] calldata requests
+    ) public onlyOwner returns (uint256[] memory tokenIds) {
+        tokenIds = new uint256[](requests.length);
+        for (uint256 i = 0; i < requests.length; i++) {
+            MintRequest calldata request = requests[i];
+            tokenIds[i] = _mintExoplanet(
+                to,
+                request.planetName,
+                request.hostStar,
+                request.uri,
+                request.habitabilityScore,
+                request.fundingGoal,
+                request.rarity
+            );
+        }
+    }
+    
+    function _mintExoplanet(
+        address to,
+        string memory planetName,
+        string memory hostStar,
+        string memory uri,
+        uint256 habitabilityScore,
+        uint256 fundingGoal,
+        string memory rarity
+    ) internal returns (uint256) {
         uint256 tokenId = _tokenIdCounter++;
         _safeMint(to, tokenId);
         _setTokenURI(tokenId, uri);
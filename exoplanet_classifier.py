@@ -0,0 +1,187 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+# Model inputs, in the order /api/classify sends them: period, radius, star temperature
+FEATURE_COLUMNS = ('orbital_period', 'radius', 'star_temp')
+
+# KOI dispositions counted as a planet; FALSE POSITIVE is the negative class
+PLANET_DISPOSITIONS = ('CONFIRMED', 'CANDIDATE')
+LABELED_DISPOSITIONS = PLANET_DISPOSITIONS + ('FALSE POSITIVE',)
+
+def training_data(catalog):
+    """Feature matrix and 0/1 labels from the rows of the catalog with a known disposition"""
+    disposition = catalog.columns['disposition']
+    labeled = np.isin(disposition, LABELED_DISPOSITIONS)
+    features = np.column_stack([catalog.columns[name][labeled] for name in FEATURE_COLUMNS])
+    labels = np.isin(disposition[labeled], PLANET_DISPOSITIONS).astype(np.int8)
+    return features, labels
+
+def train_model(features, labels, random_state=0):
+    """Fit the gradient boosting model on (period, radius, star temp) rows"""
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    model = HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1, random_state=random_state)
+    model.fit(features, labels)
+    return model
+
+class ModelUnavailableError(RuntimeError):
+    """No saved model and nothing to train one from yet (e.g. the catalog could not be downloaded)"""
+
+class ExoplanetClassifier:
+    """
+    Scores candidates as real planets with a model trained on KOI dispositions.
+    The model is loaded (memory-mapped) on first use; if there is no saved model yet
+    it is trained from the catalog returned by `catalog` and saved to model_path.
+    """
+    
+    def __init__(self, model_path='data/classifier.joblib', catalog=None, threshold=0.5):
+        self.model_path = model_path
+        self.catalog = catalog
+        self.threshold = threshold
+        self._model = None
+        self._lock = threading.Lock()
+    
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_or_train()
+        return self._model
+    
+    def _load_or_train(self):
+        import joblib
+        if self.model_path and os.path.exists(self.model_path):
+            try:
+                # Tree arrays stay in the page cache and are shared between worker processes
+                return joblib.load(self.model_path, mmap_mode='r')
+            except Exception as e:
+                print(f"Error loading classifier model: {e}")
+        
+        if self.catalog is None:
+            raise ModelUnavailableError(f"No classifier model at {self.model_path} and no catalog to train from")
+        features, labels = training_data(self.catalog())
+        if len(np.unique(labels)) < 2:
+            raise ModelUnavailableError("Catalog has no labeled planets of both classes to train on")
+        print(f"🧠 Training classifier on {len(labels)} KOI rows")
+        model = train_model(features, labels)
+        self.save(model)
+        return model
+    
+    def save(self, model):
+        """Write the model atomically, uncompressed so it can be memory-mapped"""
+        if not self.model_path:
+            return
+        import joblib
+        try:
+            directory = os.path.dirname(self.model_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.model_path}.{os.getpid()}.tmp"
+            joblib.dump(model, tmp_path)
+            os.replace(tmp_path, self.model_path)
+        except OSError as e:
+            print(f"Error saving classifier model: {e}")
+    
+    def predict_proba(self, rows):
+        """Probability of being a planet for each [period, radius, temp] row, in one call"""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
+        if not len(rows):
+            return np.empty(0)
+        return self.model.predict_proba(rows)[:, 1]
+    
+    def predict_batch(self, rows):
+        """Vectorized predict: (is_candidate array, score array)"""
+        scores = self.predict_proba(rows)
+        return scores > self.threshold, scores
+    
+    def predict(self, features):
+        """Single-row predict, returns (is_candidate, score)"""
+        is_candidate, scores = self.predict_batch([features])
+        return bool(is_candidate[0]), float(scores[0])
+    
+    def score_catalog(self, catalog):
+        """Planet probability for every row of a catalog, e.g. to re-score it after a refresh"""
+        return self.predict_proba(np.column_stack([catalog.columns[name] for name in FEATURE_COLUMNS]))
+
+class MicroBatchingClassifier:
+    """
+    Dynamic batcher in front of a classifier: concurrent single-row predict() calls are
+    queued, and a worker thread scores up to max_batch of them in one predict_batch call,
+    waiting at most max_latency seconds for a batch to fill.
+    """
+    
+    def __init__(self, classifier, max_batch=64, max_latency=0.002):
+        self.classifier = classifier
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+    
+    def _start(self):
+        # Started on first use, so each gunicorn worker process gets its own thread after fork
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='classify-batcher', daemon=True)
+                self._worker.start()
+    
+    def predict(self, features):
+        """Same interface as ExoplanetClassifier.predict; blocks until the batch holding this row is scored"""
+        if self._worker is None:
+            self._start()
+        future = Future()
+        self._queue.put((features, future))
+        return future.result()
+    
+    def predict_batch(self, rows):
+        # Callers that already have a batch skip the queue
+        return self.classifier.predict_batch(rows)
+    
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                is_candidate, scores = self.classifier.predict_batch([features for features, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), candidate, score in zip(batch, is_candidate, scores):
+                future.set_result((bool(candidate), float(score)))
+
+if __name__ == '__main__':
+    import argparse
+    from nasa_scraper import NASAExoplanetScraper
+    from sklearn.model_selection import train_test_split
+    
+    parser = argparse.ArgumentParser(description='Train the exoplanet classifier on KOI dispositions')
+    parser.add_argument('--output', default='data/classifier.joblib')
+    parser.add_argument('--catalog', default='data/catalog.npz')
+    args = parser.parse_args()
+    
+    catalog = NASAExoplanetScraper(cache_path=args.catalog).get_catalog()
+    features, labels = training_data(catalog)
+    
+    # Held-out accuracy first, then the final model is fit on every labeled row
+    train_x, test_x, train_y, test_y = train_test_split(features, labels, test_size=0.2, random_state=0, stratify=labels)
+    accuracy = train_model(train_x, train_y).score(test_x, test_y)
+    print(f"Accuracy (20% holdout): {accuracy:.3f}")
+    
+    classifier = ExoplanetClassifier(model_path=args.output)
+    classifier.save(train_model(features, labels))
+    print(f"✅ Model saved to {args.output} ({len(labels)} rows)")
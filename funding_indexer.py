@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from metrics import metrics
+from web3_integration import SpaceTokenContract
+
+WEI_PER_FIL = 10 ** 18
+
+# Bumped when the checkpoint layout changes; older checkpoints are re-indexed from start_block
+CHECKPOINT_FORMAT = 2
+
+class FundingIndexer:
+    """
+    Follows the TokenMinted and FundingReceived events of the SpaceTokens contract and keeps
+    the funding received per token locally, checkpointed by block. The API reads the totals
+    from memory instead of calling the RPC node for each token. Tokens minted outside the
+    indexed range get their planet name from the contract, once.
+    """
+    
+    def __init__(self, minter, checkpoint_path='data/funding_index.json', start_block=0, confirmations=2,
+                 poll_interval=30, chunk_size=2000):
+        self.minter = minter
+        self.checkpoint_path = checkpoint_path
+        self.start_block = start_block
+        # Stay this many blocks behind the head so short reorgs don't need to be undone
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        # Blocks per eth_getLogs call; RPC providers cap the range
+        self.chunk_size = chunk_size
+        
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._loaded = False
+        self._thread = None
+        # last_block: last block fully indexed; token_planets: on-chain token id -> planet name;
+        # funding: on-chain token id -> wei received
+        self.last_block = start_block - 1
+        self.token_planets = {}
+        self.funding = {}
+        self.version = 0
+        self._totals = (None, {})
+    
+    @property
+    def enabled(self):
+        return bool(self.minter.contract_address)
+    
+    def _load_checkpoint(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+                return
+            try:
+                with open(self.checkpoint_path) as f:
+                    state = json.load(f)
+                if state.get('contract') != self.minter.contract_address or state.get('format') != CHECKPOINT_FORMAT:
+                    # Index of a different deployment, or in an older layout
+                    return
+                self.last_block = state['last_block']
+                self.token_planets = {int(token_id): name for token_id, name in state['token_planets'].items()}
+                self.funding = {int(token_id): int(amount) for token_id, amount in state['funding'].items()}
+                self.version += 1
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error reading funding index checkpoint: {e}")
+    
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        state = {
+            'format': CHECKPOINT_FORMAT,
+            'contract': self.minter.contract_address,
+            'last_block': self.last_block,
+            'token_planets': self.token_planets,
+            # Amounts as strings: wei values overflow JSON numbers in some clients
+            'funding': {token_id: str(amount) for token_id, amount in self.funding.items()}
+        }
+        try:
+            directory = os.path.dirname(self.checkpoint_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.checkpoint_path)
+        except OSError as e:
+            print(f"Error saving funding index checkpoint: {e}")
+    
+    def sync(self):
+        """Index every new confirmed block; returns the number of events applied"""
+        if not self.enabled:
+            return 0
+        self._load_checkpoint()
+        
+        with self._sync_lock:
+            w3 = self.minter.w3
+            contract = w3.eth.contract(
+                address=w3.to_checksum_address(self.minter.contract_address),
+                abi=SpaceTokenContract.ABI
+            )
+            minted = contract.events.TokenMinted()
+            funded = contract.events.FundingReceived()
+            topics = {
+                w3.keccak(text='TokenMinted(uint256,string,uint256)'): minted,
+                w3.keccak(text='FundingReceived(uint256,address,uint256)'): funded
+            }
+            
+            # Names that could not be read during an earlier sync
+            pending = [token_id for token_id in self.funding if token_id not in self.token_planets]
+            if pending:
+                token_planets = dict(self.token_planets)
+                if self._resolve_names(contract, token_planets, pending):
+                    with self._lock:
+                        self.token_planets = token_planets
+                        self.version += 1
+                    self._save_checkpoint()
+            
+            head = w3.eth.block_number - self.confirmations
+            applied = 0
+            while self.last_block < head:
+                from_block = self.last_block + 1
+                to_block = min(head, from_block + self.chunk_size - 1)
+                # One eth_getLogs call for both events, already in block/log order
+                logs = w3.eth.get_logs({
+                    'address': contract.address,
+                    'fromBlock': from_block,
+                    'toBlock': to_block,
+                    'topics': [[topic.hex() for topic in topics]]
+                })
+                
+                token_planets = dict(self.token_planets)
+                funding = dict(self.funding)
+                for log in logs:
+                    event = topics[bytes(log['topics'][0])].process_log(log)
+                    token_id = event['args']['tokenId']
+                    if event['event'] == 'TokenMinted':
+                        token_planets[token_id] = event['args']['planetName']
+                    else:
+                        funding[token_id] = funding.get(token_id, 0) + event['args']['amount']
+                # Funded tokens minted before start_block (or a checkpoint reset) have no TokenMinted here
+                resolved = self._resolve_names(contract, token_planets, [token_id for token_id in funding
+                                                                         if token_id not in token_planets])
+                
+                # Readers always see a consistent (block, totals) pair
+                with self._lock:
+                    self.token_planets = token_planets
+                    self.funding = funding
+                    self.last_block = to_block
+                    if logs or resolved:
+                        self.version += 1
+                self._save_checkpoint()
+                applied += len(logs)
+            return applied
+    
+    def _resolve_names(self, contract, token_planets, token_ids):
+        """
+        Read the planet names of tokens not seen being minted; returns how many were read.
+        Failures are retried on the next chunk or sync.
+        """
+        resolved = 0
+        for token_id in token_ids:
+            try:
+                token_planets[token_id] = contract.functions.exoplanets(token_id).call()[0]
+            except Exception as e:
+                print(f"Error reading planet name of token {token_id}: {e}")
+                metrics.upstream_error('rpc')
+                break
+            resolved += 1
+        return resolved
+    
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Error indexing funding events: {e}")
+                metrics.upstream_error('rpc')
+            time.sleep(self.poll_interval)
+    
+    def start(self):
+        """Start the polling thread (once per process, so it survives gunicorn forking the app)"""
+        if not self.enabled or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='funding-indexer', daemon=True)
+                self._thread.start()
+    
+    def totals(self):
+        """
+        Funding received per planet name, in FIL, or None when no contract is configured.
+        The same dict is returned until new events are indexed.
+        """
+        if not self.enabled:
+            return None
+        self._load_checkpoint()
+        self.start()
+        with self._lock:
+            if self._totals[0] != self.version:
+                totals = {}
+                for token_id, amount in self.funding.items():
+                    # Names are resolved during sync; a token whose name could not be read yet counts later
+                    name = self.token_planets.get(token_id)
+                    if name is not None:
+                        totals[name] = totals.get(name, 0) + amount
+                self._totals = (self.version, {name: amount / WEI_PER_FIL for name, amount in totals.items()})
+            return self._totals[1]
@@ -0,0 +1,21 @@
+import os
+
+# The API mostly waits on NASA, IPFS and the RPC node, so each worker serves many requests
+# on threads instead of one at a time (gunicorn's default sync worker).
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+# Mint job status lives in process memory: keep a single worker unless polling is sticky
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+
+# Slow upstreams are bounded by the HTTP client timeouts; this only catches stuck workers
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Never recycled by default: a restart would drop the in-memory mint jobs (and kill the ones
+# still waiting on a receipt), so clients polling /api/mint/<id> would get 404 for real mints
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
@@ -0,0 +1,67 @@
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class HTTPClient:
+    """Shared HTTP session: keep-alive pooling, default timeouts, bounded retries and per-host limits"""
+    
+    def __init__(self, timeout=(5, 30), retries=3, backoff_factor=0.5, pool_size=16, max_per_host=8,
+                 retry_statuses=(429, 500, 502, 503, 504)):
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        
+        # allowed_methods=None retries every method, POST included. That is safe only because the
+        # POSTs sent through this client are idempotent: IPFS pins by CID, so repeating an upload
+        # that already reached Pinata pins the same content again instead of adding a new object.
+        # Don't send non-idempotent POSTs through this client without a Retry that excludes them.
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=retry_statuses,
+            allowed_methods=None,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._host_limits = {}
+        self._lock = threading.Lock()
+    
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return limit
+    
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the pooled session. At most max_per_host requests per host wait on
+        the network at once (for stream=True, until the response headers arrive).
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        with self._host_limit(url):
+            return self.session.request(method, url, **kwargs)
+    
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+_default_client = None
+_default_lock = threading.Lock()
+
+def default_client():
+    """Process-wide client shared by the NASA scraper and the IPFS uploader"""
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = HTTPClient()
+    return _default_client
@@ -0,0 +1,166 @@
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, features
+
+# Output format -> (file extension, MIME type, Pillow save options); most compact first
+FORMATS = {
+    'avif': ('avif', 'image/avif', {'quality': 50}),
+    'webp': ('webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'image/jpeg', {'quality': 80, 'optimize': True, 'progressive': True})
+}
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def supported_formats():
+    """Formats this Pillow build can encode (AVIF needs Pillow >= 11.2 built with libavif)"""
+    available = []
+    for name in FORMATS:
+        try:
+            if name == 'jpeg' or features.check(name):
+                available.append(name)
+        except ValueError:
+            pass
+    return tuple(available)
+
+def encode_image(img, fmt, width=None):
+    """Encode a PIL image as fmt, downscaled to `width` pixels wide if it is larger"""
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if width and img.width > width:
+        img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS, reducing_gap=3.0)
+    _, _, options = FORMATS[fmt]
+    buffered = io.BytesIO()
+    img.save(buffered, format=fmt.upper(), **options)
+    return buffered.getvalue()
+
+class ImageDerivatives:
+    """
+    Resized, recompressed copies of the planet images, written to <directory>/derived/ as
+    <name>-<width>.<ext> and described to the frontend as srcset strings.
+    """
+    
+    def __init__(self, directory='static/planets', url_prefix='/static/planets', widths=(256, 512), formats=None):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.widths = tuple(sorted(widths))
+        self.formats = tuple(formats or supported_formats())
+        self.derived_dir = os.path.join(directory, 'derived')
+        self._lock = threading.Lock()
+        # (derived directory mtime, file names in it)
+        self._listing = (None, frozenset())
+        self._background = None
+    
+    def derivative_name(self, filename, width, fmt):
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        return f"{stem}-{width}.{FORMATS[fmt][0]}"
+    
+    def generate(self, filename):
+        """Write the missing or outdated derivatives of one image; returns how many were written"""
+        source = os.path.join(self.directory, filename)
+        source_mtime = os.stat(source).st_mtime
+        pending = [
+            (width, fmt) for width in self.widths for fmt in self.formats
+            if not self._is_current(self.derivative_name(filename, width, fmt), source_mtime)
+        ]
+        if not pending:
+            return 0
+        
+        os.makedirs(self.derived_dir, exist_ok=True)
+        with Image.open(source) as img:
+            img.load()
+            for width, fmt in pending:
+                path = os.path.join(self.derived_dir, self.derivative_name(filename, width, fmt))
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(encode_image(img, fmt, width))
+                os.replace(tmp_path, path)
+        return len(pending)
+    
+    def _is_current(self, name, source_mtime):
+        try:
+            return os.stat(os.path.join(self.derived_dir, name)).st_mtime >= source_mtime
+        except OSError:
+            return False
+    
+    def sources(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.lower().endswith(SOURCE_EXTENSIONS) and os.path.isfile(os.path.join(self.directory, name))
+        )
+    
+    def generate_all(self, workers=None):
+        """Generate derivatives for every image in the directory on a process pool"""
+        filenames = self.sources()
+        if workers == 1 or len(filenames) <= 1:
+            return sum(self.generate(filename) for filename in filenames)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(_generate, [(self.directory, self.widths, self.formats, name) for name in filenames]))
+    
+    def generate_in_background(self):
+        """Fill in missing derivatives on a thread, once per process"""
+        with self._lock:
+            if self._background is not None:
+                return
+            self._background = threading.Thread(target=self._generate_missing, name='image-derivatives', daemon=True)
+            self._background.start()
+    
+    def _generate_missing(self):
+        try:
+            written = sum(self.generate(filename) for filename in self.sources())
+            if written:
+                print(f"🖼️  {written} derived images written to {self.derived_dir}")
+        except Exception as e:
+            print(f"Error generating derived images: {e}")
+    
+    @property
+    def version(self):
+        """Modification time of the derived directory, so caches of srcset maps know when to rebuild"""
+        try:
+            return os.stat(self.derived_dir).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _existing(self):
+        version = self.version
+        listing_version, names = self._listing
+        if listing_version != version:
+            with self._lock:
+                names = frozenset(os.listdir(self.derived_dir)) if version is not None else frozenset()
+                self._listing = (version, names)
+        return names
+    
+    def srcset(self, image_url):
+        """{format: 'url 256w, url 512w'} for the derivatives of an image that exist on disk"""
+        names = self._existing()
+        filename = os.path.basename(image_url)
+        result = {}
+        for fmt in self.formats:
+            candidates = []
+            for width in self.widths:
+                name = self.derivative_name(filename, width, fmt)
+                if name in names:
+                    candidates.append(f"{self.url_prefix}/derived/{name} {width}w")
+            if candidates:
+                result[fmt] = ', '.join(candidates)
+        return result
+
+def _generate(job):
+    """Process pool task: derivatives for one image"""
+    directory, widths, formats, filename = job
+    return ImageDerivatives(directory, widths=widths, formats=formats).generate(filename)
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Generate thumbnails and WebP/AVIF/JPEG variants of the planet images')
+    parser.add_argument('--directory', default='static/planets')
+    parser.add_argument('--widths', default='256,512')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    
+    derivatives = ImageDerivatives(args.directory, widths=[int(width) for width in args.widths.split(',')])
+    written = derivatives.generate_all(workers=args.workers)
+    print(f"✅ {written} derived images written to {derivatives.derived_dir} ({', '.join(derivatives.formats)})")
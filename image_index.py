@@ -0,0 +1,108 @@
+import bisect
+import os
+import threading
+
+class PlanetImageIndex:
+    """In-memory index of planet images, rebuilt only when the directory changes"""
+    
+    def __init__(self, directory='static/planets', url_prefix='/static/planets', extension='.jpg'):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.extension = extension
+        self._lock = threading.Lock()
+        self._mtime = None
+        # (filenames, exact map, joined clean names, offsets), swapped as one tuple on rebuild
+        self._state = ([], {}, '', [])
+    
+    @staticmethod
+    def clean_planet_name(planet_name):
+        return planet_name.replace(' ', '').replace('-', '').replace('_', '').lower()
+    
+    @staticmethod
+    def clean_filename(filename):
+        return os.path.splitext(filename)[0].replace('_', '').replace('-', '').lower()
+    
+    def _refresh(self):
+        """Rebuild the index if files were added, removed or renamed since the last build"""
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            
+            filenames = []
+            if mtime is not None:
+                filenames = sorted(
+                    name for name in os.listdir(self.directory)
+                    if name.endswith(self.extension) and os.path.isfile(os.path.join(self.directory, name))
+                )
+            clean_names = [self.clean_filename(name) for name in filenames]
+            
+            # Exact map keeps the first file for each clean name
+            exact = {}
+            for position, clean_name in enumerate(clean_names):
+                exact.setdefault(clean_name, position)
+            
+            # All clean names joined in one string, so "name in filename" is a single str.find
+            offsets = []
+            joined_length = 0
+            for clean_name in clean_names:
+                offsets.append(joined_length)
+                joined_length += len(clean_name) + 1
+            
+            self._state = (filenames, exact, '\n'.join(clean_names), offsets)
+            self._mtime = mtime
+    
+    @property
+    def version(self):
+        """Modification time of the directory the index was built from (None if it doesn't exist)"""
+        self._refresh()
+        return self._mtime
+    
+    def find(self, planet_name):
+        """Return the URL of the image for a planet: exact match first, then partial matches"""
+        self._refresh()
+        filenames, exact, joined, offsets = self._state
+        if not filenames:
+            return None
+        
+        clean_name = self.clean_planet_name(planet_name)
+        position = exact.get(clean_name)
+        
+        if position is None:
+            candidates = []
+            
+            # Planet name contained in a filename
+            found = joined.find(clean_name)
+            if found != -1:
+                candidates.append(bisect.bisect_right(offsets, found) - 1)
+            
+            # Filename contained in the planet name: look up every substring of the name
+            for start in range(len(clean_name)):
+                for end in range(start + 1, len(clean_name) + 1):
+                    match = exact.get(clean_name[start:end])
+                    if match is not None:
+                        candidates.append(match)
+            
+            if not candidates:
+                return None
+            position = min(candidates)
+        
+        return f'{self.url_prefix}/{filenames[position]}'
+    
+    def images(self):
+        """List indexed images for /api/planet-images"""
+        self._refresh()
+        return [
+            {
+                'filename': filename,
+                'path': f'{self.url_prefix}/{filename}',
+                'clean_name': filename.replace('_', '').replace('-', '').lower().replace(self.extension, '')
+            }
+            for filename in self._state[0]
+        ]
@@ -1,12 +1,19 @@
-import requests
 import json
 import io
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http_session import default_client
+from metrics import metrics
 
 class IPFSUploader:
     """Sube archivos a IPFS usando Pinata o nft.storage"""
     
-    def __init__(self, service='pinata', api_key=None, api_secret=None):
+    def __init__(self, service='pinata', api_key=None, api_secret=None, http=None, cid_cache_path=None):
         self.service = service
+        # Sesión compartida con pool de conexiones, timeouts y reintentos
+        self.http = http or default_client()
         self.api_key = api_key or 'YOUR_PINATA_API_KEY'
         self.api_secret = api_secret or 'YOUR_PINATA_SECRET'
         
@@ -15,38 +22,116 @@ class IPFSUploader:
             self.json_url = 'https://api.pinata.cloud/pinning/pinJSONToIPFS'
         elif service == 'nft.storage':
             self.upload_url = 'https://api.nft.storage/upload'
+        
+        # Caché persistente hash SHA-256 del contenido -> URI IPFS, para no volver a subir lo ya fijado
+        self.cid_cache_path = cid_cache_path
+        self._cid_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._cids = self._load_cid_cache()
+    
+    def _load_cid_cache(self):
+        if not self.cid_cache_path or not os.path.exists(self.cid_cache_path):
+            return {}
+        try:
+            with open(self.cid_cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error leyendo caché de CIDs: {e}")
+            return {}
+    
+    def _remember_cid(self, content_hash, uri, persist=True):
+        """Guarda un CID real (nunca los simulados); con persist=False solo en memoria, hasta el próximo _save_cid_cache"""
+        with self._cid_lock:
+            self._cids[content_hash] = uri
+        if persist:
+            self._save_cid_cache()
+    
+    def _save_cid_cache(self):
+        """Persiste la caché de forma atómica, sin bloquear a los hilos que siguen subiendo"""
+        if not self.cid_cache_path:
+            return
+        with self._save_lock:
+            with self._cid_lock:
+                cids = dict(self._cids)
+            try:
+                directory = os.path.dirname(self.cid_cache_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.cid_cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(cids, f)
+                os.replace(tmp_path, self.cid_cache_path)
+            except OSError as e:
+                print(f"Error guardando caché de CIDs: {e}")
+    
+    @staticmethod
+    def _image_bytes(image_pil):
+        """Bytes PNG de una imagen PIL (o los mismos bytes si ya viene codificada)"""
+        if isinstance(image_pil, bytes):
+            return image_pil
+        img_bytes = io.BytesIO()
+        image_pil.save(img_bytes, format='PNG')
+        return img_bytes.getvalue()
+    
+    @staticmethod
+    def _metadata_bytes(metadata_dict):
+        """Serialización canónica, para que la misma metadata tenga siempre el mismo hash"""
+        return json.dumps(metadata_dict, sort_keys=True, separators=(',', ':')).encode()
     
     def upload_image(self, image_pil, filename):
-        """Sube imagen PIL a IPFS"""
+        """Sube imagen PIL (o bytes PNG ya codificados) a IPFS"""
         try:
             # Convertir PIL a bytes
-            img_bytes = io.BytesIO()
-            image_pil.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-            
+            png_bytes = self._image_bytes(image_pil)
+        except Exception as e:
+            print(f"Error uploading image: {e}")
+            return self._mock_ipfs_hash(filename)
+        return self._upload_file(png_bytes, filename, hashlib.sha256(png_bytes).hexdigest())
+    
+    def _upload_file(self, png_bytes, filename, content_hash, persist=True):
+        cached = self._cids.get(content_hash)
+        metrics.cache_lookup('ipfs_cid', hit=bool(cached))
+        if cached:
+            return cached
+        
+        try:
             if self.service == 'pinata':
-                files = {'file': (filename, img_bytes, 'image/png')}
+                files = {'file': (filename, io.BytesIO(png_bytes), 'image/png')}
                 headers = {
                     'pinata_api_key': self.api_key,
                     'pinata_secret_api_key': self.api_secret
                 }
-                response = requests.post(self.upload_url, files=files, headers=headers)
+                with metrics.timed('ipfs_upload'):
+                    response = self.http.post(self.upload_url, files=files, headers=headers)
                 
                 if response.status_code == 200:
                     ipfs_hash = response.json()['IpfsHash']
-                    return f"ipfs://{ipfs_hash}"
+                    uri = f"ipfs://{ipfs_hash}"
+                    self._remember_cid(content_hash, uri, persist)
+                    return uri
                 else:
                     print(f"Error uploading to Pinata: {response.text}")
+                    metrics.upstream_error('pinata')
                     return self._mock_ipfs_hash(filename)
             else:
                 return self._mock_ipfs_hash(filename)
-                
+        
         except Exception as e:
             print(f"Error uploading image: {e}")
+            metrics.upstream_error('pinata')
             return self._mock_ipfs_hash(filename)
     
     def upload_metadata(self, metadata_dict):
         """Sube metadata JSON a IPFS"""
+        content_hash = hashlib.sha256(self._metadata_bytes(metadata_dict)).hexdigest()
+        return self._upload_json(metadata_dict, content_hash)
+    
+    def _upload_json(self, metadata_dict, content_hash, persist=True):
+        cached = self._cids.get(content_hash)
+        metrics.cache_lookup('ipfs_cid', hit=bool(cached))
+        if cached:
+            return cached
+        
         try:
             if self.service == 'pinata':
                 headers = {
@@ -54,29 +139,67 @@ class IPFSUploader:
                     'pinata_secret_api_key': self.api_secret,
                     'Content-Type': 'application/json'
                 }
-                response = requests.post(self.json_url, json=metadata_dict, headers=headers)
+                with metrics.timed('ipfs_upload'):
+                    response = self.http.post(self.json_url, json=metadata_dict, headers=headers)
                 
                 if response.status_code == 200:
                     ipfs_hash = response.json()['IpfsHash']
-                    return f"ipfs://{ipfs_hash}"
+                    uri = f"ipfs://{ipfs_hash}"
+                    self._remember_cid(content_hash, uri, persist)
+                    return uri
                 else:
                     print(f"Error uploading metadata: {response.text}")
+                    metrics.upstream_error('pinata')
                     return self._mock_metadata_hash(metadata_dict['name'])
             else:
                 return self._mock_metadata_hash(metadata_dict['name'])
-                
+        
         except Exception as e:
             print(f"Error uploading metadata: {e}")
+            metrics.upstream_error('pinata')
             return self._mock_metadata_hash(metadata_dict['name'])
     
+    def upload_many(self, images=(), metadata=(), workers=8):
+        """
+        Sube en paralelo imágenes (pares (imagen, filename)) y documentos de metadata.
+        El contenido se identifica por su hash antes de subir: lo repetido en el lote se sube
+        una sola vez y lo que ya está en la caché de CIDs no se envía.
+        Devuelve {'images': [...], 'metadata': [...]} con las URIs en el mismo orden.
+        """
+        image_items = []
+        for image_pil, filename in images:
+            png_bytes = self._image_bytes(image_pil)
+            image_items.append((png_bytes, filename, hashlib.sha256(png_bytes).hexdigest()))
+        metadata_items = [
+            (metadata_dict, hashlib.sha256(self._metadata_bytes(metadata_dict)).hexdigest())
+            for metadata_dict in metadata
+        ]
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            image_uploads = {}
+            for png_bytes, filename, content_hash in image_items:
+                if content_hash not in image_uploads:
+                    image_uploads[content_hash] = pool.submit(self._upload_file, png_bytes, filename, content_hash, False)
+            metadata_uploads = {}
+            for metadata_dict, content_hash in metadata_items:
+                if content_hash not in metadata_uploads:
+                    metadata_uploads[content_hash] = pool.submit(self._upload_json, metadata_dict, content_hash, False)
+            
+            # Los CIDs nuevos del lote se guardan en memoria y se escriben a disco una sola vez al final
+            try:
+                return {
+                    'images': [image_uploads[content_hash].result() for _, _, content_hash in image_items],
+                    'metadata': [metadata_uploads[content_hash].result() for _, content_hash in metadata_items]
+                }
+            finally:
+                self._save_cid_cache()
+    
     def _mock_ipfs_hash(self, filename):
         """Genera hash IPFS simulado para desarrollo"""
-        import hashlib
         hash_obj = hashlib.sha256(filename.encode())
         return f"ipfs://Qm{hash_obj.hexdigest()[:44]}"
     
     def _mock_metadata_hash(self, name):
         """Genera hash IPFS simulado para metadata"""
-        import hashlib
         hash_obj = hashlib.sha256(f"metadata_{name}".encode())
         return f"ipfs://Qm{hash_obj.hexdigest()[:44]}"
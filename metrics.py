@@ -0,0 +1,131 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Everything the app exports: name (without prefix) -> (type, help)
+METRICS = {
+    'stage_duration_seconds': ('histogram', 'Time spent in each processing stage'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by route, method and status'),
+    'mint_stage_duration_seconds': ('histogram', 'Duration of each stage of the background mint pipeline'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result'),
+    'cache_hit_ratio': ('gauge', 'Share of cache lookups answered without recomputing'),
+    'upstream_errors_total': ('counter', 'Failed calls to NASA, Pinata and the RPC node')
+}
+
+# Spans of the request being handled, for the Server-Timing header (None outside requests)
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Metrics:
+    """
+    In-process counters and latency histograms, rendered in the Prometheus text format.
+    Each gunicorn worker keeps its own; Prometheus sums them by scraping each instance.
+    """
+    
+    def __init__(self, prefix='spacetokens', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # name -> {label key: value}
+        self._counters = {}
+        # name -> {label key: [count per bucket..., count above the last bucket, sum]}
+        self._histograms = {}
+    
+    def inc(self, name, value=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+    
+    def observe(self, name, value, **labels):
+        key = _label_key(labels)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bucket] += 1
+            counts[-1] += value
+    
+    def cache_lookup(self, cache, hit):
+        self.inc('cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+    
+    def upstream_error(self, service):
+        self.inc('upstream_errors_total', service=service)
+    
+    @contextmanager
+    def timed(self, stage):
+        """Time a block as one stage; also listed in the Server-Timing header of the current request"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe('stage_duration_seconds', elapsed, stage=stage)
+            spans = _request_spans.get()
+            if spans is not None:
+                spans.append((stage, elapsed))
+    
+    def start_request(self):
+        _request_spans.set([])
+    
+    def server_timing(self):
+        """Server-Timing header value for the spans recorded during the current request"""
+        spans = _request_spans.get() or []
+        return ', '.join(f'{stage};dur={elapsed * 1000:.1f}' for stage, elapsed in spans)
+    
+    def _hit_ratios(self):
+        totals = {}
+        for key, value in self._counters.get('cache_requests_total', {}).items():
+            labels = dict(key)
+            hits, lookups = totals.get(labels['cache'], (0, 0))
+            totals[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), lookups + value)
+        return {(('cache', cache),): hits / lookups for cache, (hits, lookups) in totals.items() if lookups}
+    
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            series_by_name = {name: dict(series) for name, series in self._counters.items()}
+            series_by_name['cache_hit_ratio'] = self._hit_ratios()
+            histograms = {name: {key: list(counts) for key, counts in series.items()}
+                          for name, series in self._histograms.items()}
+        
+        for name, (kind, help_text) in METRICS.items():
+            full_name = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            if kind != 'histogram':
+                for key, value in sorted(series_by_name.get(name, {}).items()):
+                    lines.append(f'{full_name}{_format_labels(key)} {_format_value(value)}')
+                continue
+            
+            for key, counts in sorted(histograms.get(name, {}).items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f'{full_name}_bucket{_format_labels(key, [("le", bound)])} {cumulative}')
+                lines.append(f'{full_name}_sum{_format_labels(key)} {_format_value(counts[-1])}')
+                lines.append(f'{full_name}_count{_format_labels(key)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry used by the app's modules
+metrics = Metrics()
@@ -0,0 +1,120 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from metrics import metrics
+
+class MintJob:
+    """State of one queued mint, updated by the worker as it moves through the pipeline stages"""
+    
+    def __init__(self, params, key=None):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.key = key
+        self.status = 'queued'
+        self.stages = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def stage(self, name):
+        """Record a pipeline stage and its duration; stages may run in parallel threads"""
+        record = {'name': name, 'status': 'running', 'started_at': time.time(), 'duration_ms': None}
+        with self._lock:
+            self.stages.append(record)
+        try:
+            yield
+        except Exception:
+            record['status'] = 'failed'
+            raise
+        else:
+            record['status'] = 'done'
+        finally:
+            elapsed = time.time() - record['started_at']
+            record['duration_ms'] = round(elapsed * 1000, 1)
+            metrics.observe('mint_stage_duration_seconds', elapsed, stage=name)
+    
+    def to_dict(self):
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'stage': next((s['name'] for s in reversed(self.stages) if s['status'] == 'running'), None),
+                'stages': [dict(s) for s in self.stages],
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at
+            }
+
+class MintJobQueue:
+    """Runs mint jobs on a thread pool and keeps the most recent ones for status polling"""
+    
+    def __init__(self, run_job, workers=4, max_jobs=1000):
+        self.run_job = run_job
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mint')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> jobs waiting for the one with that key that is already queued or running
+        self._pending = {}
+    
+    def submit(self, key=None, **params):
+        """
+        Queue a job. Jobs with the same key (e.g. the planet being minted) never run at the same
+        time: each one is handed to the pool when the previous finishes, so they never hold a
+        worker while waiting and a burst for one key can't starve the others.
+        """
+        job = MintJob(params, key)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs once over the limit
+            while len(self._jobs) > self.max_jobs:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status in ('queued', 'running'):
+                    break
+                self._jobs.popitem(last=False)
+            if key is not None:
+                if key in self._pending:
+                    self._pending[key].append(job)
+                    return job
+                self._pending[key] = deque()
+        self._executor.submit(self._run, job)
+        return job
+    
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def _run(self, job):
+        job.status = 'running'
+        try:
+            result = self.run_job(job, **job.params)
+            with job._lock:
+                job.result = result
+                job.status = 'done'
+        except Exception as e:
+            print(f"❌ Mint job {job.id} failed: {e}")
+            with job._lock:
+                job.error = str(e)
+                job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            self._run_next(job.key)
+    
+    def _run_next(self, key):
+        """Hand the next job waiting on `key` to the pool, or forget the key if none is left"""
+        if key is None:
+            return
+        with self._lock:
+            waiting = self._pending[key]
+            if not waiting:
+                del self._pending[key]
+                return
+            job = waiting.popleft()
+        self._executor.submit(self._run, job)
@@ -1,78 +1,388 @@
-import requests
+import csv
+import os
+import threading
+import time
+import numpy as np
+from http_session import default_client
+from metrics import metrics
 from datetime import datetime
 
+# Columns requested from the 'cumulative' table
+ARCHIVE_COLUMNS = ('kepoi_name', 'kepler_name', 'koi_disposition', 'koi_period', 'koi_prad',
+                   'koi_teq', 'koi_steff', 'koi_srad', 'koi_slogg', 'koi_score')
+NUMERIC_ARCHIVE_COLUMNS = ('koi_period', 'koi_prad', 'koi_teq', 'koi_steff', 'koi_srad', 'koi_slogg', 'koi_score')
+
+# Columns kept in the local catalog; strings first, then numeric values
+STRING_COLUMNS = ('name', 'kepoi_name', 'disposition')
+NUMERIC_COLUMNS = ('orbital_period', 'radius', 'equilibrium_temp', 'star_temp', 'star_radius', 'koi_score')
+
+def normalize_planet_name(name):
+    """Normalize a planet name for lookups ('Kepler-227 b' -> 'kepler227b')"""
+    return name.replace(' ', '').replace('-', '').replace('_', '').lower()
+
+def habitability_scores(radius, equilibrium_temp, orbital_period, star_temp, koi_score):
+    """Vectorized NASAExoplanetScraper.calculate_habitability_score over column arrays"""
+    radius = np.asarray(radius, dtype=np.float64)
+    equilibrium_temp = np.asarray(equilibrium_temp, dtype=np.float64)
+    orbital_period = np.asarray(orbital_period, dtype=np.float64)
+    star_temp = np.asarray(star_temp, dtype=np.float64)
+    koi_score = np.asarray(koi_score, dtype=np.float64)
+    
+    # Same terms, added in the same order as the scalar version so results are bit-identical
+    score = np.where(koi_score != 0, koi_score * 100, 0.0)
+    score = np.where((radius >= 0.5) & (radius <= 2.0), score + 30, score)
+    score = np.where((equilibrium_temp >= 200) & (equilibrium_temp <= 350), score + 30, score)
+    score = np.where((orbital_period >= 200) & (orbital_period <= 500), score + 20, score)
+    score = np.where((star_temp >= 4000) & (star_temp <= 7000), score + 20, score)
+    return np.minimum(score, 100)
+
+def rarity_classes(scores):
+    """Vectorized NASAExoplanetScraper.classify_rarity over an array of scores"""
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.select(
+        [scores >= 80, scores >= 60, scores >= 40],
+        ["Ultra Rare", "Rare", "Uncommon"],
+        default="Common"
+    )
+
+class ExoplanetCatalog:
+    """In-memory columnar copy of the KOI table, persisted as a NumPy .npz file"""
+
+    def __init__(self, columns, fetched_at=0.0, checked_at=None, etag='', last_modified=''):
+        self.columns = columns
+        self.fetched_at = fetched_at
+        self.checked_at = fetched_at if checked_at is None else checked_at
+        self.etag = etag
+        self.last_modified = last_modified
+        # Scored once per catalog instead of once per request
+        with metrics.timed('scoring'):
+            self.habitability = habitability_scores(
+                columns['radius'], columns['equilibrium_temp'], columns['orbital_period'],
+                columns['star_temp'], columns['koi_score']
+            )
+            self.rarity = rarity_classes(self.habitability)
+        self.planets = self._build_planets()
+        self._build_indexes()
+
+    def __len__(self):
+        return len(self.columns['name'])
+
+    @classmethod
+    def empty(cls):
+        columns = {name: np.array([], dtype=str) for name in STRING_COLUMNS}
+        columns.update({name: np.array([], dtype=np.float64) for name in NUMERIC_COLUMNS})
+        return cls(columns)
+
+    def _build_planets(self):
+        """Materialize the row dicts served by fetch_exoplanets once per catalog"""
+        fetched_at = datetime.fromtimestamp(self.fetched_at).isoformat()
+        values = {name: column.tolist() for name, column in self.columns.items()}
+        values['habitability_score'] = self.habitability.tolist()
+        values['rarity'] = self.rarity.tolist()
+        names = list(values)
+        return [
+            self.planet_record(dict(zip(names, row)), fetched_at)
+            for row in zip(*(values[name] for name in names))
+        ]
+
+    @staticmethod
+    def planet_record(values, fetched_at):
+        """Build the public planet dict from one row of catalog column values"""
+        kepoi_name = values['kepoi_name']
+        return {
+            'name': values['name'],
+            'host_star': kepoi_name.split('.')[0] if kepoi_name else 'Unknown',
+            'discovery_method': 'Transit',
+            'discovery_year': 2015,  # Approximate for Kepler data
+            'orbital_period': values['orbital_period'],
+            'radius': values['radius'],
+            'mass': 0,  # Not available in cumulative table
+            'equilibrium_temp': values['equilibrium_temp'],
+            'star_temp': values['star_temp'],
+            'star_radius': values['star_radius'],
+            'star_mass': 0,  # Not available in cumulative table
+            'distance': 0,  # Not available in cumulative table
+            'koi_score': values['koi_score'],
+            'disposition': values['disposition'],
+            'habitability_score': values['habitability_score'],
+            'rarity': values['rarity'],
+            'fetched_at': fetched_at
+        }
+
+    def _build_indexes(self):
+        """Hash indexes by exact name/KOI id, normalized name and host star"""
+        self.by_name = {}
+        self.by_normalized_name = {}
+        self.by_host_star = {}
+        for i, planet in enumerate(self.planets):
+            kepoi_name = self.columns['kepoi_name'][i]
+            for key in (planet['name'], str(kepoi_name)):
+                if key:
+                    self.by_name.setdefault(key, i)
+                    self.by_normalized_name.setdefault(normalize_planet_name(key), i)
+            self.by_host_star.setdefault(planet['host_star'], []).append(i)
+
+        # Sorted column indexes for range queries: (row order, values in that order)
+        self.sorted_columns = {}
+        numeric = {name: self.columns[name] for name in NUMERIC_COLUMNS}
+        numeric['habitability_score'] = self.habitability
+        for name, values in numeric.items():
+            order = np.argsort(values, kind='stable')
+            self.sorted_columns[name] = (order, values[order])
+
+    def find(self, name):
+        """Return the row index for a planet name or KOI id, or None"""
+        if not name:
+            return None
+        index = self.by_name.get(name)
+        if index is None:
+            index = self.by_normalized_name.get(normalize_planet_name(name))
+        return index
+
+    def save(self, path):
+        """Write the catalog atomically so concurrent workers never read a partial file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                fetched_at=np.array(self.fetched_at),
+                checked_at=np.array(self.checked_at),
+                etag=np.array(self.etag),
+                last_modified=np.array(self.last_modified),
+                **self.columns
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            columns = {name: data[name] for name in STRING_COLUMNS + NUMERIC_COLUMNS}
+            return cls(
+                columns,
+                fetched_at=float(data['fetched_at']),
+                checked_at=float(data['checked_at']),
+                etag=str(data['etag']),
+                last_modified=str(data['last_modified'])
+            )
+
 class NASAExoplanetScraper:
-    def __init__(self):
+    def __init__(self, cache_path='data/catalog.npz', ttl=6 * 3600, retry_interval=60, http=None):
+        self.http = http or default_client()
         self.base_url = "https://exoplanetarchive.ipac.caltech.edu/cgi-bin/nstedAPI/nph-nstedAPI"
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self._catalog = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._last_attempt = 0.0
+    
+    @property
+    def catalog(self):
+        return self.get_catalog()
+    
+    def get_catalog(self):
+        """Return the cached catalog, loading it on first use and refreshing it in the background once stale"""
+        catalog = self._catalog
+        if catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = self._load_initial_catalog()
+                catalog = self._catalog
+        
+        now = time.time()
+        if now - catalog.checked_at >= self.ttl and now - self._last_attempt >= self.retry_interval:
+            self._refresh_in_background()
+        return catalog
+    
+    def _load_initial_catalog(self):
+        if self.cache_path and os.path.exists(self.cache_path):
+            try:
+                return ExoplanetCatalog.load(self.cache_path)
+            except Exception as e:
+                print(f"Error loading catalog cache: {e}")
         
-    def fetch_exoplanets(self, limit=100):
-        """Fetch exoplanet data from NASA Exoplanet Archive using the correct API"""
-        # Use the 'cumulative' table (Kepler Objects of Interest) with proper API parameters
+        catalog = self._download_catalog()
+        return catalog if catalog is not None else ExoplanetCatalog.empty()
+    
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, daemon=True).start()
+    
+    def refresh(self):
+        """Re-download the catalog, sending the stored validators so an unchanged archive costs a 304"""
+        try:
+            current = self._catalog
+            catalog = self._download_catalog(current)
+            if catalog is not None:
+                self._catalog = catalog
+            return self._catalog
+        finally:
+            self._refreshing = False
+    
+    def _open_archive(self, headers=None):
+        """Open a streamed CSV response for the 'cumulative' table (Kepler Objects of Interest)"""
         params = {
             'table': 'cumulative',
-            'format': 'json',
-            'select': 'kepoi_name,kepler_name,koi_disposition,koi_period,koi_prad,koi_teq,koi_steff,koi_srad,koi_slogg,koi_score'
+            'format': 'csv',
+            'select': ','.join(ARCHIVE_COLUMNS)
         }
+        response = self.http.get(self.base_url, params=params, headers=headers, stream=True)
+        # The archive does not always declare a charset for text/csv
+        response.encoding = 'utf-8'
+        return response
+    
+    def _iter_archive_rows(self, response):
+        """Parse the CSV body incrementally, yielding one typed row per line as it arrives"""
+        for row in csv.DictReader(response.iter_lines(decode_unicode=True)):
+            for column in NUMERIC_ARCHIVE_COLUMNS:
+                value = row.get(column)
+                row[column] = float(value) if value else None
+            yield row
+    
+    def _iter_valid_rows(self, rows):
+        """Filter rows with valid data and project them onto the catalog columns"""
+        for planet in rows:
+            # Filter for planets with valid data
+            if (planet.get('koi_prad') and planet.get('koi_period') and 
+                planet.get('koi_steff') and planet.get('koi_prad') > 0 and 
+                planet.get('koi_period') > 0 and planet.get('koi_steff') > 0):
+                
+                yield {
+                    # Use Kepler name if available, otherwise use KOI name
+                    'name': planet.get('kepler_name') or planet.get('kepoi_name') or 'Unknown',
+                    'kepoi_name': planet.get('kepoi_name') or '',
+                    'disposition': planet.get('koi_disposition') or 'Unknown',
+                    'orbital_period': planet['koi_period'],
+                    'radius': planet['koi_prad'],
+                    # Missing measurements are stored as 0, like the fields the table does not provide
+                    'equilibrium_temp': planet.get('koi_teq') or 0,
+                    'star_temp': planet['koi_steff'],
+                    'star_radius': planet.get('koi_srad') or 0,
+                    'koi_score': planet.get('koi_score') or 0
+                }
+    
+    def _download_catalog(self, current=None):
+        """Download the full table; returns None when the download fails"""
+        self._last_attempt = time.time()
+        
+        headers = {}
+        if current is not None and len(current):
+            if current.etag:
+                headers['If-None-Match'] = current.etag
+            if current.last_modified:
+                headers['If-Modified-Since'] = current.last_modified
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            # The API returns data in a different format, check if it's a list or has a data field
-            data = response.json()
-            
-            # Handle different response formats
-            if isinstance(data, dict) and 'data' in data:
-                planets_data = data['data']
-            elif isinstance(data, list):
-                planets_data = data
-            else:
-                print(f"Unexpected data format: {type(data)}")
-                return []
-            
-            if not planets_data:
-                return []
-            
-            # Process and clean data - limit results and filter for valid data
-            exoplanets = []
-            for i, planet in enumerate(planets_data):
-                if i >= limit * 2:  # Get more data to filter
-                    break
+            with metrics.timed('nasa_fetch'):
+                response = self._open_archive(headers)
+            with response:
+                if response.status_code == 304:
+                    current.checked_at = time.time()
+                    self._save(current)
+                    return current
                 
-                # Filter for planets with valid data
-                if (planet.get('koi_prad') and planet.get('koi_period') and 
-                    planet.get('koi_steff') and planet.get('koi_prad') > 0 and 
-                    planet.get('koi_period') > 0 and planet.get('koi_steff') > 0):
-                    
-                    # Use Kepler name if available, otherwise use KOI name
-                    planet_name = planet.get('kepler_name') or planet.get('kepoi_name', 'Unknown')
-                    
-                    exoplanets.append({
-                        'name': planet_name,
-                        'host_star': planet.get('kepoi_name', 'Unknown').split('.')[0] if planet.get('kepoi_name') else 'Unknown',
-                        'discovery_method': 'Transit',
-                        'discovery_year': 2015,  # Approximate for Kepler data
-                        'orbital_period': planet.get('koi_period', 0),
-                        'radius': planet.get('koi_prad', 0),
-                        'mass': 0,  # Not available in cumulative table
-                        'equilibrium_temp': planet.get('koi_teq', 0),
-                        'star_temp': planet.get('koi_steff', 0),
-                        'star_radius': planet.get('koi_srad', 0),
-                        'star_mass': 0,  # Not available in cumulative table
-                        'distance': 0,  # Not available in cumulative table
-                        'koi_score': planet.get('koi_score', 0),
-                        'disposition': planet.get('koi_disposition', 'Unknown'),
-                        'fetched_at': datetime.now().isoformat()
-                    })
-                    
-                    if len(exoplanets) >= limit:
-                        break
+                response.raise_for_status()
+                # The body is parsed as it streams in, so this also includes the transfer
+                with metrics.timed('parse'):
+                    columns = self._build_columns(self._iter_valid_rows(self._iter_archive_rows(response)))
             
-            return exoplanets
+            catalog = ExoplanetCatalog(
+                columns,
+                fetched_at=time.time(),
+                etag=response.headers.get('ETag', ''),
+                last_modified=response.headers.get('Last-Modified', '')
+            )
+            self._save(catalog)
+            return catalog
             
         except Exception as e:
             print(f"Error fetching data: {e}")
+            metrics.upstream_error('nasa')
+            return None
+    
+    def _build_columns(self, records):
+        """Append projected rows column by column, so the full table never exists as dicts"""
+        columns = {name: [] for name in STRING_COLUMNS + NUMERIC_COLUMNS}
+        for record in records:
+            for name, values in columns.items():
+                values.append(record[name])
+        
+        arrays = {name: np.array(columns[name], dtype=str) for name in STRING_COLUMNS}
+        arrays.update({name: np.array(columns[name], dtype=np.float64) for name in NUMERIC_COLUMNS})
+        return arrays
+    
+    def _save(self, catalog):
+        if not self.cache_path:
+            return
+        try:
+            catalog.save(self.cache_path)
+        except OSError as e:
+            print(f"Error saving catalog cache: {e}")
+        
+    def fetch_exoplanets(self, limit=100, stream=False):
+        """Return the first `limit` valid exoplanets from the cached NASA catalog, or live from the archive with stream=True"""
+        if stream:
+            return list(self.stream_exoplanets(limit))
+        if limit is not None and limit <= 0:
+            # A negative slice bound would count from the end of the catalog
             return []
+        
+        catalog = self.get_catalog()
+        # Copies, so callers can annotate planets without touching the cache
+        return [dict(planet) for planet in catalog.planets[:limit]]
+    
+    def stream_exoplanets(self, limit=None):
+        """Yield valid planets live from the archive as rows arrive, closing the connection once `limit` are read"""
+        if limit is not None and limit <= 0:
+            return
+        
+        fetched_at = datetime.now().isoformat()
+        count = 0
+        try:
+            with self._open_archive() as response:
+                response.raise_for_status()
+                for record in self._iter_valid_rows(self._iter_archive_rows(response)):
+                    record['habitability_score'] = self.calculate_habitability_score(record)
+                    record['rarity'] = self.classify_rarity(record['habitability_score'])
+                    yield ExoplanetCatalog.planet_record(record, fetched_at)
+                    
+                    count += 1
+                    if limit is not None and count >= limit:
+                        break
+        except Exception as e:
+            print(f"Error fetching data: {e}")
+            metrics.upstream_error('nasa')
+    
+    def get_planet(self, name):
+        """Look up a planet by name, KOI id or normalized name; returns a copy or None"""
+        return self.get_planets([name])[0]
+    
+    def get_planets(self, names):
+        """Look up several planets against the same catalog snapshot"""
+        catalog = self.get_catalog()
+        planets = []
+        for name in names:
+            index = catalog.find(name)
+            planets.append(dict(catalog.planets[index]) if index is not None else None)
+        return planets
+    
+    def query_planets(self, query):
+        """Run a PlanetQuery against the cached catalog; returns (total matches, copies of the requested page)"""
+        catalog = self.get_catalog()
+        total, rows = query.run(catalog)
+        return total, [dict(catalog.planets[i]) for i in rows]
+    
+    def get_host_planets(self, host_star):
+        """Return every cataloged planet orbiting the given host star"""
+        catalog = self.get_catalog()
+        return [dict(catalog.planets[i]) for i in catalog.by_host_star.get(host_star, [])]
     
     def calculate_habitability_score(self, planet):
         """Calculate habitability score based on planet characteristics"""
@@ -100,6 +410,10 @@ class NASAExoplanetScraper:
         
         return min(score, 100)
     
+    def calculate_habitability_scores(self, radius, equilibrium_temp, orbital_period, star_temp, koi_score):
+        """Score whole columns at once; matches calculate_habitability_score row by row"""
+        return habitability_scores(radius, equilibrium_temp, orbital_period, star_temp, koi_score)
+    
     def classify_rarity(self, habitability_score):
         """Classify planet rarity based on habitability"""
         if habitability_score >= 80:
@@ -110,6 +424,10 @@ class NASAExoplanetScraper:
             return "Uncommon"
         else:
             return "Common"
+    
+    def classify_rarities(self, habitability_scores):
+        """Classify an array of scores at once; matches classify_rarity element-wise"""
+        return rarity_classes(habitability_scores)
 
 if __name__ == "__main__":
     scraper = NASAExoplanetScraper()
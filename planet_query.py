@@ -0,0 +1,165 @@
+import numpy as np
+
+# Query parameter name -> catalog column
+QUERY_FIELDS = {
+    'radius': 'radius',
+    'period': 'orbital_period',
+    'teq': 'equilibrium_temp',
+    'steff': 'star_temp',
+    'srad': 'star_radius',
+    'koi_score': 'koi_score',
+    'habitability': 'habitability_score'
+}
+
+# Operator suffix -> (lower bound inclusive, upper bound inclusive); None where the side is open
+OPERATORS = {
+    'lt': (None, False),
+    'lte': (None, True),
+    'gt': (False, None),
+    'gte': (True, None),
+    'between': (True, True)
+}
+
+MAX_PER_PAGE = 500
+
+class PlanetQuery:
+    """
+    Range filters, sort and page over the catalog's sorted column indexes, e.g.
+    ?radius_lt=2&teq_between=200,350&sort=-habitability&page=3
+    """
+    
+    def __init__(self, filters=(), sort=None, descending=False, page=1, per_page=20):
+        # filters: (column, low, high, low_inclusive, high_inclusive); low/high may be None
+        self.filters = list(filters)
+        self.sort = sort
+        self.descending = descending
+        self.page = page
+        self.per_page = per_page
+    
+    @classmethod
+    def from_args(cls, args):
+        """Parse request query arguments; raises ValueError on unknown parameters or bad values"""
+        filters = []
+        sort = None
+        descending = False
+        page = 1
+        per_page = 20
+        
+        for key, value in args.items():
+            if key == 'sort':
+                descending = value.startswith('-')
+                field = value.lstrip('-')
+                if field not in QUERY_FIELDS:
+                    raise ValueError(f"Unknown sort field: {field}")
+                sort = QUERY_FIELDS[field]
+            elif key in ('page', 'per_page'):
+                number = cls._parse_int(key, value)
+                if number < 1:
+                    raise ValueError(f"{key} must be positive")
+                if key == 'page':
+                    page = number
+                else:
+                    per_page = min(number, MAX_PER_PAGE)
+            else:
+                field, _, operator = key.rpartition('_')
+                if field not in QUERY_FIELDS or operator not in OPERATORS:
+                    raise ValueError(f"Unknown query parameter: {key}")
+                filters.append(cls._parse_filter(QUERY_FIELDS[field], operator, key, value))
+        
+        return cls(filters, sort, descending, page, per_page)
+    
+    @staticmethod
+    def _parse_int(key, value):
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"{key} must be an integer") from None
+    
+    @staticmethod
+    def _parse_float(key, value):
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"{key} must be a number") from None
+        if np.isnan(number):
+            raise ValueError(f"{key} must be a number")
+        return number
+    
+    @classmethod
+    def _parse_filter(cls, column, operator, key, value):
+        low_inclusive, high_inclusive = OPERATORS[operator]
+        if operator == 'between':
+            bounds = value.split(',')
+            if len(bounds) != 2:
+                raise ValueError(f"{key} expects two values: low,high")
+            low, high = (cls._parse_float(key, bound) for bound in bounds)
+            if low > high:
+                raise ValueError(f"{key}: low bound is greater than high bound")
+            return (column, low, high, True, True)
+        
+        number = cls._parse_float(key, value)
+        if low_inclusive is None:
+            return (column, None, number, None, high_inclusive)
+        return (column, number, None, low_inclusive, None)
+    
+    @staticmethod
+    def _range(catalog, column, low, high, low_inclusive, high_inclusive):
+        """Row ids whose value is inside the bounds: two binary searches on the sorted column"""
+        order, values = catalog.sorted_columns[column]
+        start = 0
+        if low is not None:
+            start = np.searchsorted(values, low, side='left' if low_inclusive else 'right')
+        end = len(values)
+        if high is not None:
+            end = np.searchsorted(values, high, side='right' if high_inclusive else 'left')
+        return order[start:max(start, end)]
+    
+    @staticmethod
+    def _in_range(values, low, high, low_inclusive, high_inclusive):
+        mask = np.ones(len(values), dtype=bool)
+        if low is not None:
+            mask &= values >= low if low_inclusive else values > low
+        if high is not None:
+            mask &= values <= high if high_inclusive else values < high
+        return mask
+    
+    def matches(self, catalog):
+        """Row ids matching every filter, in the requested order"""
+        if not self.filters:
+            rows = None
+        else:
+            # Scan only the most selective range, then check the other filters on those rows
+            ranges = [self._range(catalog, *condition) for condition in self.filters]
+            best = min(range(len(ranges)), key=lambda i: len(ranges[i]))
+            rows = ranges[best]
+            for i, (column, *bounds) in enumerate(self.filters):
+                if i != best and len(rows):
+                    rows = rows[self._in_range(self._column(catalog, column)[rows], *bounds)]
+        
+        if self.sort is None:
+            # Catalog order, like /api/nasa/fetch
+            return np.arange(len(catalog)) if rows is None else np.sort(rows)
+        
+        order, _ = catalog.sorted_columns[self.sort]
+        if rows is None:
+            rows = order
+        else:
+            # Keep the rows in the precomputed sort order instead of sorting them again
+            selected = np.zeros(len(catalog), dtype=bool)
+            selected[rows] = True
+            rows = order[selected[order]]
+        if self.descending:
+            values = self._column(catalog, self.sort)[rows]
+            # Reverse the ascending order, but keep catalog order between equal values
+            rows = rows[(len(rows) - 1 - np.argsort(values[::-1], kind='stable'))[::-1]]
+        return rows
+    
+    @staticmethod
+    def _column(catalog, column):
+        return catalog.habitability if column == 'habitability_score' else catalog.columns[column]
+    
+    def run(self, catalog):
+        """Return (total matches, row ids of the requested page)"""
+        rows = self.matches(catalog)
+        start = (self.page - 1) * self.per_page
+        return len(rows), rows[start:start + self.per_page].tolist()
@@ -0,0 +1,80 @@
+"""
+Startup report: how long each import takes when a worker boots, and what the lazily
+initialized components cost on their first use.
+
+    python profile_startup.py [--json]
+"""
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Third-party imports first, then the app's own modules, in the order app.py pulls them in
+# (each module after the ones it imports, so none is folded into another's time)
+IMPORTS = ('numpy', 'requests', 'flask', 'flask_cors', 'PIL.Image', 'metrics', 'http_session', 'nasa_scraper',
+           'web3_integration', 'image_derivatives', 'planet_visualizer', 'ipfs_uploader', 'image_index',
+           'mint_jobs', 'token_snapshot', 'planet_query', 'similar_planets', 'exoplanet_classifier',
+           'funding_indexer', 'app')
+
+# Marks a first-use step that does not apply to this configuration
+SKIPPED = 'skipped'
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def profile_imports():
+    # Each module is charged only for what earlier imports did not already load
+    return [(name, timed(lambda: importlib.import_module(name))) for name in IMPORTS]
+
+def build_derivatives():
+    """What the first /api/tokens starts in the background on a fresh deploy, written to a scratch copy"""
+    from image_derivatives import ImageDerivatives
+    with tempfile.TemporaryDirectory() as workdir:
+        directory = os.path.join(workdir, 'planets')
+        shutil.copytree('static/planets', directory, ignore=shutil.ignore_patterns('derived'))
+        ImageDerivatives(directory).generate_all(workers=1)
+
+def profile_first_use():
+    app = sys.modules['app']
+    steps = [
+        ('catalog load', app.scraper.get_catalog),
+        ('/api/tokens snapshot', app.token_snapshots.get),
+        ('KD-tree (sklearn import + build)', app.similar_planets.get),
+        ('classifier model', lambda: app.model.predict([365, 1.0, 5778])),
+        ('web3 client (web3 import)', lambda: app.minter.w3),
+        # Only with SPACE_TOKENS_CONTRACT: checkpoint load and catch-up to the chain head
+        ('funding index sync', app.funding_indexer.sync if app.funding_indexer.enabled else None),
+        ('image variants (all images)', build_derivatives),
+        ('first planet render', lambda: app.visualizer.generate_planet_png({'st_teff': 5778, 'pl_rade': 1.0}))
+    ]
+    results = []
+    for name, step in steps:
+        if step is None:
+            results.append((name, SKIPPED))
+            continue
+        try:
+            results.append((name, timed(step)))
+        except Exception as e:
+            print(f"⚠️  {name}: {e}", file=sys.stderr)
+            results.append((name, None))
+    return results
+
+if __name__ == '__main__':
+    imports = profile_imports()
+    first_use = profile_first_use()
+    
+    if '--json' in sys.argv:
+        print(json.dumps({'imports_ms': dict(imports), 'first_use_ms': dict(first_use)}, indent=2))
+    else:
+        print("Imports (ms)")
+        for name, ms in imports:
+            print(f"  {name:<36} {ms:>8}")
+        print(f"  {'total':<36} {round(sum(ms for _, ms in imports), 1):>8}")
+        print("First use of lazy components (ms)")
+        for name, ms in first_use:
+            print(f"  {name:<36} {ms if ms is not None else 'failed':>8}")
@@ -0,0 +1,64 @@
+import threading
+import numpy as np
+
+# Catalog columns compared when looking for similar planets
+SIMILARITY_COLUMNS = ('radius', 'orbital_period', 'equilibrium_temp', 'star_temp', 'koi_score')
+
+class SimilarPlanetIndex:
+    """KD-tree over z-score normalized planet features of one catalog"""
+    
+    def __init__(self, catalog):
+        # Imported here: scikit-learn takes over a second to import and most workers never need it
+        from sklearn.neighbors import KDTree
+        self.catalog = catalog
+        features = np.column_stack([catalog.columns[name] for name in SIMILARITY_COLUMNS]).astype(np.float64)
+        self.mean = features.mean(axis=0) if len(features) else np.zeros(len(SIMILARITY_COLUMNS))
+        std = features.std(axis=0) if len(features) else np.ones(len(SIMILARITY_COLUMNS))
+        # Constant columns would divide by zero; they don't help tell planets apart anyway
+        self.std = np.where(std > 0, std, 1.0)
+        self.features = (features - self.mean) / self.std
+        self.tree = KDTree(self.features) if len(features) else None
+    
+    def similar(self, index, k=10):
+        """Return [(row, distance)] for the k planets closest to row `index`, excluding itself"""
+        if self.tree is None or k < 1:
+            return []
+        count = min(k + 1, len(self.features))
+        distances, rows = self.tree.query(self.features[index:index + 1], k=count)
+        return [
+            (int(row), float(distance))
+            for row, distance in zip(rows[0], distances[0])
+            if row != index
+        ][:k]
+
+class SimilarPlanetsCache:
+    """Builds the SimilarPlanetIndex once per catalog refresh"""
+    
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self._lock = threading.Lock()
+        self._index = None
+    
+    def get(self):
+        catalog = self.scraper.get_catalog()
+        index = self._index
+        if index is not None and index.catalog is catalog:
+            return index
+        
+        with self._lock:
+            if self._index is None or self._index.catalog is not catalog:
+                self._index = SimilarPlanetIndex(catalog)
+            return self._index
+    
+    def similar_planets(self, name, k=10):
+        """Copies of the k planets most similar to `name`, each with its 'distance'; None if unknown"""
+        index = self.get()
+        row = index.catalog.find(name)
+        if row is None:
+            return None
+        planets = []
+        for neighbor, distance in index.similar(row, k):
+            planet = dict(index.catalog.planets[neighbor])
+            planet['distance'] = round(distance, 4)
+            planets.append(planet)
+        return planets
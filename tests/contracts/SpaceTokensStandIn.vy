@@ -0,0 +1,56 @@
+# @version 0.3.10
+# Stand-in for contracts/SpaceTokens.sol in tests (solc is not needed): the same mint,
+# fundResearch and exoplanets(tokenId) ABI and the same events, without the ERC-721 parts.
+# Build: vyper -f bytecode SpaceTokensStandIn.vy > SpaceTokensStandIn.bin
+
+event TokenMinted:
+    tokenId: indexed(uint256)
+    planetName: String[64]
+    habitabilityScore: uint256
+
+event FundingReceived:
+    tokenId: indexed(uint256)
+    funder: address
+    amount: uint256
+
+struct ExoplanetData:
+    planetName: String[64]
+    hostStar: String[64]
+    habitabilityScore: uint256
+    fundingGoal: uint256
+    currentFunding: uint256
+    rarity: String[32]
+
+tokenIdCounter: uint256
+data: HashMap[uint256, ExoplanetData]
+
+@external
+def mint(to: address, planetName: String[64], hostStar: String[64], uri: String[128],
+         habitabilityScore: uint256, fundingGoal: uint256, rarity: String[32]) -> uint256:
+    tokenId: uint256 = self.tokenIdCounter
+    self.tokenIdCounter += 1
+    self.data[tokenId] = ExoplanetData({
+        planetName: planetName,
+        hostStar: hostStar,
+        habitabilityScore: habitabilityScore,
+        fundingGoal: fundingGoal,
+        currentFunding: 0,
+        rarity: rarity
+    })
+    log TokenMinted(tokenId, planetName, habitabilityScore)
+    return tokenId
+
+@external
+@payable
+def fundResearch(tokenId: uint256):
+    assert tokenId < self.tokenIdCounter, "Token does not exist"
+    assert msg.value > 0, "Must send funding"
+    self.data[tokenId].currentFunding += msg.value
+    log FundingReceived(tokenId, msg.sender, msg.value)
+
+# Same outputs as the public getter solc generates for SpaceTokens.exoplanets
+@view
+@external
+def exoplanets(tokenId: uint256) -> (String[64], String[64], uint256, uint256, uint256, String[32]):
+    planet: ExoplanetData = self.data[tokenId]
+    return planet.planetName, planet.hostStar, planet.habitabilityScore, planet.fundingGoal, planet.currentFunding, planet.rarity
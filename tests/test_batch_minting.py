@@ -0,0 +1,86 @@
+import pytest
+
+eth_tester = pytest.importorskip('eth_tester')
+from web3 import Web3, EthereumTesterProvider
+from web3_integration import FilecoinNFTMinter
+
+TOKEN_MINTED = Web3.keccak(text='TokenMinted(uint256,string,uint256)')
+
+# Stand-in for SpaceTokens.mintBatch (solc is not needed to run the tests): for each request
+# in the calldata it emits TokenMinted(_tokenIdCounter++, "", 0), like _mintExoplanet does
+RUNTIME = (
+    '6024356004013560406000525b'    # n = length of requests[]; mem[0] = offset of planetName
+    '8015604957'                    # while n != 0:
+    '600054806001016000557f' + TOKEN_MINTED.hex().removeprefix('0x') +  # token id = counter++
+    '60606000a2'                    # log2(mem[0:0x60], TokenMinted, token id)
+    '60019003600c565b00'            # n -= 1
+)
+
+def planet(name, score=50):
+    return {
+        'name': name, 'host_star': name.rsplit(' ', 1)[0], 'discovery_method': 'Transit',
+        'discovery_year': 2015, 'orbital_period': 112.3, 'radius': 1.34, 'mass': 2.3,
+        'equilibrium_temp': 233, 'distance': 1206, 'rarity': 'Rare', 'habitability_score': score
+    }
+
+@pytest.fixture
+def minter():
+    backend = eth_tester.PyEVMBackend()
+    w3 = Web3(EthereumTesterProvider(eth_tester.EthereumTester(backend)))
+    private_key = backend.account_keys[0]
+    init = f'60{len(RUNTIME) // 2:02x}80600b6000396000f3' + RUNTIME
+    account = w3.eth.account.from_key(private_key)
+    tx_hash = w3.eth.send_transaction({'from': account.address, 'data': '0x' + init})
+    contract_address = w3.eth.wait_for_transaction_receipt(tx_hash)['contractAddress']
+    return FilecoinNFTMinter(contract_address=contract_address, private_key=private_key.to_hex(),
+                             batch_size=2, w3=w3)
+
+OWNER = '0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb0'
+
+def test_token_ids_come_from_the_receipts(minter):
+    planets = [planet(f'Kepler-{i} b') for i in range(5)]
+    results = minter.mint_many(planets, OWNER, wait=True)
+    
+    assert [result['success'] for result in results] == [True] * 5
+    # Numbered by the contract, not the sha256 ids of the simulated mode
+    assert [result['token_id'] for result in results] == [0, 1, 2, 3, 4]
+    assert 'token_id_status' not in results[0]
+    
+    # One transaction per chunk of batch_size planets, with consecutive nonces in planet order
+    tx_hashes = [results[i]['tx_hash'] for i in (0, 2, 4)]
+    assert [results[i]['tx_hash'] for i in (1, 3)] == tx_hashes[:2]
+    nonces = [minter.w3.eth.get_transaction(tx_hash)['nonce'] for tx_hash in tx_hashes]
+    assert nonces == list(range(nonces[0], nonces[0] + 3))
+
+def test_token_ids_are_pending_without_wait(minter):
+    results = minter.mint_many([planet('Kepler-1 b'), planet('Kepler-2 b'), planet('Kepler-3 b')], OWNER)
+    
+    assert all(result['success'] and result['tx_hash'] for result in results)
+    assert [result['token_id'] for result in results] == [None] * 3
+    assert [result['token_id_status'] for result in results] == ['pending'] * 3
+    # The next batch continues from the locally reserved nonces and the contract's counter
+    assert [result['token_id'] for result in minter.mint_many([planet('Kepler-4 b')], OWNER, wait=True)] == [3]
+
+def test_failed_send_fails_the_rest_and_resets_nonces(minter, monkeypatch):
+    send = minter.w3.eth.send_raw_transaction
+    calls = []
+    
+    def flaky_send(raw_transaction):
+        calls.append(raw_transaction)
+        if len(calls) == 2:
+            raise ValueError('connection reset')
+        return send(raw_transaction)
+    
+    monkeypatch.setattr(minter.w3.eth, 'send_raw_transaction', flaky_send)
+    results = minter.mint_many([planet(f'Kepler-{i} b') for i in range(6)], OWNER, wait=True)
+    
+    # The first chunk went through; the failed send and every later nonce fail together
+    assert [result['success'] for result in results] == [True, True, False, False, False, False]
+    assert [result['token_id'] for result in results[:2]] == [0, 1]
+    assert all(result['error'] == 'connection reset' and result['token_id'] is None for result in results[2:])
+    assert len(calls) == 2
+    
+    # The counter is re-read from the node, so the next mint has no nonce gap
+    monkeypatch.undo()
+    results = minter.mint_many([planet('Kepler-6 b'), planet('Kepler-7 b')], OWNER, wait=True)
+    assert [result['token_id'] for result in results] == [2, 3]
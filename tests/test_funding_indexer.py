@@ -0,0 +1,105 @@
+import os
+import pytest
+
+eth_tester = pytest.importorskip('eth_tester')
+from web3 import Web3, EthereumTesterProvider
+from funding_indexer import FundingIndexer, WEI_PER_FIL
+from web3_integration import FilecoinNFTMinter, SpaceTokenContract
+
+# Compiled from contracts/SpaceTokensStandIn.vy: same events and exoplanets() getter as SpaceTokens.sol
+STAND_IN_BIN = os.path.join(os.path.dirname(__file__), 'contracts', 'SpaceTokensStandIn.bin')
+
+@pytest.fixture(autouse=True)
+def no_polling_thread(monkeypatch):
+    # The tests call sync() themselves
+    monkeypatch.setattr(FundingIndexer, 'start', lambda self: None)
+
+class Chain:
+    def __init__(self):
+        self.w3 = Web3(EthereumTesterProvider(eth_tester.EthereumTester(eth_tester.PyEVMBackend())))
+        self.account = self.w3.eth.accounts[0]
+        with open(STAND_IN_BIN) as f:
+            bytecode = f.read().strip()
+        tx_hash = self.w3.eth.send_transaction({'from': self.account, 'data': bytecode})
+        address = self.w3.eth.wait_for_transaction_receipt(tx_hash)['contractAddress']
+        self.contract = self.w3.eth.contract(address=address, abi=SpaceTokenContract.ABI)
+        self.minter = FilecoinNFTMinter(contract_address=address, w3=self.w3)
+    
+    def mint(self, planet_name):
+        tx_hash = self.contract.functions.mint(self.account, planet_name, 'Kepler-442', 'ipfs://Qm', 80, 25000, 'Rare') \
+            .transact({'from': self.account})
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        return self.contract.events.TokenMinted().process_receipt(receipt)[0]['args']['tokenId']
+    
+    def fund(self, token_id, fil):
+        tx_hash = self.contract.functions.fundResearch(token_id) \
+            .transact({'from': self.account, 'value': int(fil * WEI_PER_FIL)})
+        self.w3.eth.wait_for_transaction_receipt(tx_hash)
+    
+    def indexer(self, checkpoint_path=None, **options):
+        return FundingIndexer(self.minter, checkpoint_path=checkpoint_path, confirmations=0, **options)
+
+@pytest.fixture
+def chain():
+    return Chain()
+
+def test_mint_fund_sync(chain):
+    first, second = chain.mint('Kepler-442 b'), chain.mint('Kepler-22 b')
+    chain.fund(first, 1.5)
+    chain.fund(second, 0.25)
+    chain.fund(first, 0.5)
+    
+    indexer = chain.indexer()
+    assert indexer.sync() == 5
+    assert indexer.totals() == {'Kepler-442 b': 2.0, 'Kepler-22 b': 0.25}
+    # Nothing new: no events applied and the same totals
+    assert indexer.sync() == 0
+    assert indexer.totals() == {'Kepler-442 b': 2.0, 'Kepler-22 b': 0.25}
+
+def test_funding_of_tokens_minted_before_start_block(chain):
+    old = chain.mint('Kepler-442 b')
+    indexer = chain.indexer(start_block=chain.w3.eth.block_number + 1)
+    chain.fund(old, 1)
+    
+    # Its TokenMinted is outside the indexed range; the name is read from the contract
+    assert indexer.sync() == 1
+    assert indexer.totals() == {'Kepler-442 b': 1.0}
+
+def test_resume_from_checkpoint(chain, tmp_path):
+    checkpoint_path = str(tmp_path / 'funding_index.json')
+    token_id = chain.mint('Kepler-442 b')
+    chain.fund(token_id, 1)
+    first = chain.indexer(checkpoint_path)
+    first.sync()
+    
+    chain.fund(token_id, 2)
+    chain.fund(chain.mint('Kepler-22 b'), 0.5)
+    resumed = chain.indexer(checkpoint_path)
+    # Only the blocks after the checkpoint are scanned, so nothing is counted twice
+    assert resumed.sync() == 3
+    assert resumed.last_block == chain.w3.eth.block_number
+    assert resumed.totals() == {'Kepler-442 b': 3.0, 'Kepler-22 b': 0.5}
+
+def test_block_range_is_chunked_across_get_logs_calls(chain, monkeypatch):
+    token_ids = [chain.mint(f'Kepler-{i} b') for i in range(3)]
+    for token_id in token_ids:
+        chain.fund(token_id, 1)
+    chain.fund(token_ids[0], 1)
+    
+    get_logs = chain.w3.eth.get_logs
+    ranges = []
+    
+    def recording_get_logs(filter_params):
+        ranges.append((filter_params['fromBlock'], filter_params['toBlock']))
+        return get_logs(filter_params)
+    
+    monkeypatch.setattr(chain.w3.eth, 'get_logs', recording_get_logs)
+    indexer = chain.indexer(chunk_size=2)
+    assert indexer.sync() == 7
+    
+    # Consecutive ranges of at most chunk_size blocks, from block 0 to the head
+    head = chain.w3.eth.block_number
+    assert ranges[0][0] == 0 and ranges[-1][1] == head
+    assert all(to_block - from_block < 2 for from_block, to_block in ranges)
+    assert all(ranges[i + 1][0] == ranges[i][1] + 1 for i in range(len(ranges) - 1))
+    assert indexer.totals() == {'Kepler-0 b': 2.0, 'Kepler-1 b': 1.0, 'Kepler-2 b': 1.0}
@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+import pytest
+import requests
+from benchmarks.servers import LocalServer, fake_pinning_server
+from http_session import HTTPClient
+
+class _ScriptedHandler(BaseHTTPRequestHandler):
+    """Answers with the next status of server.statuses (200 once they run out), after server.delay seconds"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def _respond(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        with server.lock:
+            server.methods.append(self.command)
+            status = server.statuses.pop(0) if server.statuses else 200
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    do_GET = do_POST = _respond
+    
+    def log_message(self, format, *args):
+        pass
+
+def scripted_server(statuses=(), delay=0.0):
+    return LocalServer(_ScriptedHandler, statuses=list(statuses), delay=delay, methods=[],
+                       lock=threading.Lock(), in_flight=0, max_in_flight=0)
+
+def test_post_is_retried_after_503():
+    with scripted_server([503]) as server:
+        response = HTTPClient(backoff_factor=0).post(f'{server.url}/pinning/pinJSONToIPFS', json={})
+    assert response.status_code == 200
+    # Pinning is idempotent (keyed by content), so POST is retried like GET
+    assert server.httpd.methods == ['POST', 'POST']
+
+def test_get_is_retried_after_429():
+    with scripted_server([429, 429]) as server:
+        response = HTTPClient(backoff_factor=0).get(server.url)
+    assert response.status_code == 200
+    assert len(server.httpd.methods) == 3
+
+def test_retries_are_bounded_and_back_off():
+    with scripted_server([503] * 10) as server:
+        start = time.perf_counter()
+        response = HTTPClient(retries=3, backoff_factor=0.1).get(server.url)
+        elapsed = time.perf_counter() - start
+    # The last status is returned instead of raising, after 1 + 3 attempts
+    assert response.status_code == 503
+    assert len(server.httpd.methods) == 4
+    # Exponential backoff between consecutive failures: 0 + 0.2 + 0.4 seconds
+    assert elapsed >= 0.6
+
+def test_other_errors_are_not_retried():
+    with scripted_server([404]) as server:
+        response = HTTPClient(backoff_factor=0).get(server.url)
+    assert response.status_code == 404
+    assert len(server.httpd.methods) == 1
+
+def test_default_read_timeout():
+    with fake_pinning_server(latency=0.5) as server:
+        client = HTTPClient(timeout=(1, 0.1), retries=0)
+        start = time.perf_counter()
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.post(f'{server.url}/pinning/pinJSONToIPFS', json={})
+        assert time.perf_counter() - start < 0.4
+        # A per-call timeout overrides the default
+        assert client.post(f'{server.url}/pinning/pinJSONToIPFS', json={}, timeout=(1, 2)).status_code == 200
+
+def test_concurrent_requests_are_capped_per_host():
+    with scripted_server(delay=0.1) as server:
+        client = HTTPClient(max_per_host=3)
+        localhost_url = server.url.replace('127.0.0.1', 'localhost')
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            statuses = list(pool.map(lambda _: client.get(server.url).status_code, range(12)))
+        assert statuses == [200] * 12
+        assert server.httpd.max_in_flight == 3
+        
+        # The limit is per host: another host name gets its own
+        server.httpd.max_in_flight = 0
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(lambda i: client.get(server.url if i % 2 else localhost_url), range(12)))
+        assert server.httpd.max_in_flight == 6
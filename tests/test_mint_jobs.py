@@ -0,0 +1,50 @@
+import threading
+import time
+from mint_jobs import MintJobQueue
+
+def wait_for(jobs, timeout=5):
+    deadline = time.time() + timeout
+    while any(job.status in ('queued', 'running') for job in jobs):
+        assert time.time() < deadline, 'jobs did not finish'
+        time.sleep(0.01)
+
+def test_same_key_jobs_run_one_at_a_time_without_holding_workers():
+    running = {}
+    overlaps = []
+    lock = threading.Lock()
+    
+    def run_job(job, duration):
+        with lock:
+            running[job.key] = running.get(job.key, 0) + 1
+            if running[job.key] > 1:
+                overlaps.append(job.key)
+        time.sleep(duration)
+        with lock:
+            running[job.key] -= 1
+        return time.time()
+    
+    queue = MintJobQueue(run_job, workers=2)
+    burst = [queue.submit(key='Kepler-442 b', duration=0.1) for _ in range(5)]
+    # Only the first of the burst is on the pool, so the other worker is free for other planets
+    other = queue.submit(key='Kepler-22 b', duration=0)
+    wait_for([other])
+    assert sum(job.status == 'done' for job in burst) <= 1
+    
+    wait_for(burst)
+    assert overlaps == []
+    assert all(job.status == 'done' for job in burst)
+    # In submission order
+    finished = [job.result for job in burst]
+    assert finished == sorted(finished)
+
+def test_a_failed_job_releases_its_key():
+    def run_job(job, fail):
+        if fail:
+            raise RuntimeError('rpc down')
+        return 'minted'
+    
+    queue = MintJobQueue(run_job, workers=1)
+    failed, retried = queue.submit(key='Kepler-442 b', fail=True), queue.submit(key='Kepler-442 b', fail=False)
+    wait_for([failed, retried])
+    assert (failed.status, failed.error) == ('failed', 'rpc down')
+    assert (retried.status, retried.result) == ('done', 'minted')
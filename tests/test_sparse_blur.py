@@ -0,0 +1,70 @@
+import math
+import numpy as np
+import pytest
+from planet_visualizer import PlanetVisualizer
+
+SIGMA = 1.0
+
+def dense_blur(canvas, sigma=SIGMA):
+    """Reference: full separable Gaussian over the padded canvas, rounded like _sparse_blur"""
+    half = int(math.ceil(3 * sigma))
+    span = canvas.shape[0] - 2 * half
+    kernel = np.exp(-(np.arange(-half, half + 1) ** 2) / (2 * sigma * sigma)).astype(np.float32)
+    kernel /= kernel.sum()
+    values = canvas[..., :3].astype(np.float32)
+    vertical = sum(kernel[k] * values[k:k + span] for k in range(2 * half + 1))
+    blurred = sum(kernel[k] * vertical[:, k:k + span] for k in range(2 * half + 1))
+    return np.clip(blurred + 0.5, 0, 255).astype(np.uint8)
+
+def rendered_canvases(size, planets):
+    """Canvases exactly as _render_numpy hands them to the blur"""
+    canvases = []
+    original = PlanetVisualizer._sparse_blur
+    PlanetVisualizer._sparse_blur = staticmethod(lambda canvas, sigma: canvases.append(canvas.copy()))
+    try:
+        visualizer = PlanetVisualizer(size=size, backend='numpy', cache_size=0)
+        for planet in planets:
+            visualizer.generate_planet_image(planet)
+    finally:
+        PlanetVisualizer._sparse_blur = original
+    return canvases
+
+def assert_matches_dense(canvas):
+    half = int(math.ceil(3 * SIGMA))
+    span = canvas.shape[0] - 2 * half
+    expected = dense_blur(canvas)
+    PlanetVisualizer._sparse_blur(canvas, SIGMA)
+    actual = canvas[half:half + span, half:half + span, :3]
+    # Only the float summation order differs, which can move a value across a rounding boundary
+    assert np.abs(actual.astype(int) - expected).max() <= 1
+    assert (actual == expected).mean() > 0.999
+
+@pytest.mark.parametrize('size', [64, 100, 256, 512])
+def test_rendered_planets_match_dense_blur(size):
+    planets = [
+        {'pl_name': f'Test-{i} b', 'st_teff': 3000 + 700 * i, 'pl_rade': 0.3 + 0.5 * i}
+        for i in range(6)
+    ]
+    for canvas in rendered_canvases(size, planets):
+        assert_matches_dense(canvas)
+
+def test_every_tile_active_matches_dense_blur():
+    # Noise has a colour change in every tile, so no tile is skipped
+    rng = np.random.default_rng(0)
+    canvas = rng.integers(0, 256, size=(70, 70, 4), dtype=np.uint8)
+    canvas[..., 3] = 0
+    assert_matches_dense(canvas)
+
+def test_isolated_edges_near_tile_borders_match_dense_blur():
+    # Single pixels at every offset inside a tile check the neighbour-tile activation masks
+    canvas = np.zeros((8 * 8 + 6, 8 * 8 + 6, 4), dtype=np.uint8)
+    for offset in range(8):
+        canvas[3 + 8 * offset + offset, 3 + 8 * (7 - offset) + offset, :3] = 200
+        canvas[3 + 8 * offset + (7 - offset), 3 + 8 * offset + offset, :3] = 90
+    assert_matches_dense(canvas)
+
+def test_flat_canvas_is_left_unchanged():
+    canvas = np.full((38, 38, 4), 40, dtype=np.uint8)
+    before = canvas.copy()
+    PlanetVisualizer._sparse_blur(canvas, SIGMA)
+    assert np.array_equal(canvas, before)
@@ -0,0 +1,155 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from metrics import metrics
+
+# Rarity tiers from least to most rare (see nasa_scraper.rarity_classes); ?sort=rarity follows this order
+RARITY_ORDER = {'Common': 0, 'Uncommon': 1, 'Rare': 2, 'Ultra Rare': 3}
+
+class TokenSnapshot:
+    """Token list for /api/tokens, built and serialized once per catalog and image set"""
+    
+    SORT_FIELDS = ('name', 'rarity', 'confidence', 'period', 'radius', 'temp', 'fundingGoal', 'currentFunding',
+                   'currentFundingFil')
+    
+    def __init__(self, catalog, minter, image_lookup, funding=None, srcset_lookup=None, cache_size=256):
+        self.last_modified = catalog.fetched_at
+        self.cache_size = cache_size
+        self.tokens = []
+        for planet in catalog.planets:
+            image = image_lookup(planet['name'])
+            srcset = srcset_lookup(image) if image and srcset_lookup else None
+            self.tokens.append(self.token_record(planet, minter, image, funding, srcset))
+        # Each token is encoded once; a page is a join of the encoded fragments
+        self._encoded = [json.dumps(token, separators=(',', ':')).encode() for token in self.tokens]
+        self._orders = self._build_orders()
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self.tokens)
+    
+    @staticmethod
+    def token_record(planet, minter, image, funding=None, srcset=None):
+        """
+        Public token dict for one cataloged planet. funding maps planet names to indexed on-chain
+        totals in FIL, shown as currentFundingFil; srcset maps image formats to their resized variants.
+        """
+        token_id = minter.generate_token_id(planet['name'])
+        token = {
+            'id': f"EXO-{token_id % 10000}",
+            'name': planet['name'],
+            'rarity': planet['rarity'],
+            'confidence': planet['habitability_score'],
+            'period': planet['orbital_period'],
+            'radius': planet['radius'],
+            'temp': planet['star_temp'],
+            # Derived from the token id so the same planet always shows the same figures (USD)
+            'fundingGoal': minter.funding_goal(token_id),
+            'currentFunding': token_id // 40001 % 30001,
+            'discoveryYear': planet['discovery_year'],
+            'hostStar': planet['host_star']
+        }
+        if funding is not None:
+            token['currentFundingFil'] = funding.get(planet['name'], 0)
+        if image:
+            token['local_image'] = image
+        if srcset:
+            token['srcset'] = srcset
+        return token
+    
+    def _build_orders(self):
+        """Stable ascending and descending argsorts for every sortable field"""
+        orders = {'': np.arange(len(self.tokens))}
+        for field in self.SORT_FIELDS:
+            if self.tokens and field not in self.tokens[0]:
+                # currentFundingFil exists only while a contract is being indexed
+                continue
+            if field == 'rarity':
+                # Alphabetical order would put "Uncommon" above "Ultra Rare"
+                values = np.array([RARITY_ORDER.get(token['rarity'], -1) for token in self.tokens])
+            else:
+                values = np.array([token[field] for token in self.tokens])
+            orders[field] = np.argsort(values, kind='stable')
+            # Descending, keeping catalog order between equal values
+            orders[f'-{field}'] = (len(values) - 1 - np.argsort(values[::-1], kind='stable'))[::-1]
+        return orders
+    
+    def page(self, sort='', page=1, per_page=10):
+        """
+        Return (body, gzip_body, etag) for one page of tokens, serialized on first use.
+        sort is a field name, prefixed with '-' for descending; raises ValueError on bad input.
+        """
+        if sort not in self._orders:
+            raise ValueError(f"Unknown sort field: {sort}")
+        if page < 1 or per_page < 1:
+            raise ValueError("page and per_page must be positive")
+        
+        key = (sort, page, per_page)
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None:
+                self._pages.move_to_end(key)
+        metrics.cache_lookup('token_pages', hit=entry is not None)
+        if entry is not None:
+            return entry
+        
+        start = (page - 1) * per_page
+        indexes = self._orders[sort][start:start + per_page]
+        body = b'[' + b','.join(self._encoded[i] for i in indexes) + b']'
+        entry = (body, gzip.compress(body, compresslevel=6), hashlib.sha256(body).hexdigest()[:32])
+        
+        with self._lock:
+            self._pages[key] = entry
+            while len(self._pages) > self.cache_size:
+                self._pages.popitem(last=False)
+        return entry
+
+class TokenSnapshotCache:
+    """Keeps the current TokenSnapshot, rebuilding it when the catalog, the images or the funding totals change"""
+    
+    def __init__(self, scraper, minter, image_index, funding_indexer=None, derivatives=None):
+        self.scraper = scraper
+        self.minter = minter
+        self.image_index = image_index
+        self.funding_indexer = funding_indexer
+        self.derivatives = derivatives
+        self._lock = threading.Lock()
+        # (catalog, image directories version, funding totals, snapshot), swapped as one tuple on rebuild
+        self._state = (None, None, None, None)
+    
+    def _current_funding(self):
+        return self.funding_indexer.totals() if self.funding_indexer else None
+    
+    def _images_version(self):
+        # Originals and their derived variants
+        return (self.image_index.version, self.derivatives.version if self.derivatives else None)
+    
+    def get(self):
+        catalog = self.scraper.get_catalog()
+        images_version = self._images_version()
+        funding = self._current_funding()
+        source, source_images, source_funding, snapshot = self._state
+        if source is catalog and source_images == images_version and source_funding is funding:
+            return snapshot
+        
+        with self._lock:
+            source, source_images, source_funding, snapshot = self._state
+            if source is not catalog or source_images != images_version or source_funding is not funding:
+                with metrics.timed('token_snapshot'):
+                    snapshot = TokenSnapshot(
+                        catalog, self.minter, self.image_index.find, funding,
+                        self.derivatives.srcset if self.derivatives else None
+                    )
+                # Changes to the catalog or the images both make the list newer
+                for version in images_version:
+                    if version:
+                        snapshot.last_modified = max(snapshot.last_modified, version / 1e9)
+                if source_funding is not funding and source is not None:
+                    snapshot.last_modified = max(snapshot.last_modified, time.time())
+                self._state = (catalog, images_version, funding, snapshot)
+            return snapshot
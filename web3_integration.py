@@ -1,14 +1,86 @@
-from web3 import Web3
 import json
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from metrics import metrics
+
+class NonceManager:
+    """Hands out consecutive nonces locally so signed transactions can be pipelined"""
+    
+    def __init__(self, w3, address):
+        self.w3 = w3
+        self.address = address
+        self._next = None
+        self._lock = threading.Lock()
+    
+    def next(self):
+        with self._lock:
+            if self._next is None:
+                self._next = self.w3.eth.get_transaction_count(self.address, 'pending')
+            nonce = self._next
+            self._next += 1
+            return nonce
+    
+    def reset(self):
+        """Forget the local counter (e.g. after a failed send) and re-read it from the node next time"""
+        with self._lock:
+            self._next = None
 
 class FilecoinNFTMinter:
-    def __init__(self, rpc_url="https://api.calibration.node.glif.io/rpc/v1"):
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
-        self.contract_address = None
+    def __init__(self, rpc_url="https://api.calibration.node.glif.io/rpc/v1", contract_address=None,
+                 private_key=None, batch_size=50, w3=None):
+        self.rpc_url = rpc_url
+        self.contract_address = contract_address
+        # Planets per mintBatch transaction
+        self.batch_size = batch_size
+        self._private_key = private_key
+        # web3 takes seconds to import: the client and the contract are created on first use
+        self._w3 = w3
+        self._signer = None
+        self._lock = threading.Lock()
+    
+    @property
+    def w3(self):
+        if self._w3 is None:
+            with self._lock:
+                if self._w3 is None:
+                    from web3 import Web3
+                    self._w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        return self._w3
+    
+    @property
+    def onchain(self):
+        """Real transactions are sent only when both a deployed contract and a signing key are configured"""
+        return bool(self.contract_address and self._private_key)
+    
+    def _get_signer(self):
+        """(contract, account, nonce manager), built on first use"""
+        if self._signer is None:
+            w3 = self.w3
+            with self._lock:
+                if self._signer is None:
+                    contract = w3.eth.contract(
+                        address=w3.to_checksum_address(self.contract_address),
+                        abi=SpaceTokenContract.ABI
+                    )
+                    account = w3.eth.account.from_key(self._private_key)
+                    self._signer = (contract, account, NonceManager(w3, account.address))
+        return self._signer
+    
+    @property
+    def contract(self):
+        return self._get_signer()[0] if self.onchain else None
+    
+    @property
+    def account(self):
+        return self._get_signer()[1] if self.onchain else None
+    
+    @property
+    def nonces(self):
+        return self._get_signer()[2] if self.onchain else None
         
-    def generate_metadata(self, planet_data):
+    def generate_metadata(self, planet_data, created_at=None):
         """Generate NFT metadata for exoplanet"""
         metadata = {
             "name": planet_data['name'],
@@ -27,7 +99,7 @@ class FilecoinNFTMinter:
                 {"trait_type": "Habitability Score", "value": planet_data['habitability_score']}
             ],
             "external_url": f"https://exoplanets.nasa.gov/exoplanet-catalog/{planet_data['name']}/",
-            "created_at": datetime.now().isoformat()
+            "created_at": created_at or datetime.now().isoformat()
         }
         return metadata
     
@@ -36,28 +108,150 @@ class FilecoinNFTMinter:
         hash_object = hashlib.sha256(planet_name.encode())
         return int(hash_object.hexdigest()[:16], 16)
     
-    def mint_nft(self, planet_data, owner_address, metadata_uri=''):
-        """Mint NFT for exoplanet (simulation)"""
-        token_id = self.generate_token_id(planet_data['name'])
+    @staticmethod
+    def funding_goal(token_id):
+        """Funding goal in USD for a token, derived from its id so it never changes"""
+        return 10000 + token_id % 40001
+    
+    def mint_nft(self, planet_data, owner_address, metadata_uri='', wait=False):
+        """Mint NFT for exoplanet (simulated unless a contract and key are configured)"""
+        return self.mint_many([planet_data], owner_address, [metadata_uri], wait=wait)[0]
+    
+    def mint_many(self, planets, owner_address, metadata_uris=None, wait=False, workers=4):
+        """
+        Mint several planets for one owner. Token ids and metadata are built in bulk; with a
+        configured contract the planets are packed into mintBatch transactions, signed with
+        locally managed nonces and sent concurrently. The contract numbers tokens itself, so
+        on-chain token ids come from the TokenMinted events of the receipts: with wait=False
+        they are not known yet and token_id is None ('token_id_status': 'pending').
+        Returns one result per planet, in order.
+        """
+        created_at = datetime.now().isoformat()
+        token_ids = [self.generate_token_id(planet['name']) for planet in planets]
+        metadata = [self.generate_metadata(planet, created_at) for planet in planets]
+        metadata_uris = list(metadata_uris or [''] * len(planets))
+        for i, uri in enumerate(metadata_uris):
+            if not uri:
+                metadata_uris[i] = self.store_on_ipfs(metadata[i])
         
-        if not metadata_uri:
-            metadata = self.generate_metadata(planet_data)
-            metadata_uri = self.store_on_ipfs(metadata)
-        else:
-            metadata = self.generate_metadata(planet_data)
+        with metrics.timed('mint'):
+            if not self.onchain:
+                # Simulate minting transaction
+                tx_hashes = [
+                    f"0x{hashlib.sha256(f'{token_id}{owner_address}'.encode()).hexdigest()}"
+                    for token_id in token_ids
+                ]
+                errors = [None] * len(planets)
+                minted_ids = token_ids
+                contract_address = '0xSpaceTokensNFT...'
+            else:
+                tx_hashes, errors, minted_ids = self._send_batches(
+                    planets, token_ids, metadata_uris, owner_address, wait, workers
+                )
+                contract_address = self.contract.address
         
-        # Simulate minting transaction
-        tx_hash = f"0x{hashlib.sha256(f'{token_id}{owner_address}'.encode()).hexdigest()}"
+        return [
+            {
+                'success': errors[i] is None,
+                'token_id': minted_ids[i],
+                'tx_hash': tx_hashes[i],
+                'metadata': metadata[i],
+                'metadata_uri': metadata_uris[i],
+                'contract_address': contract_address,
+                'network': 'Filecoin Calibration Testnet',
+                **({'error': errors[i]} if errors[i] else {}),
+                **({'token_id_status': 'pending'} if errors[i] is None and minted_ids[i] is None else {})
+            }
+            for i in range(len(planets))
+        ]
+    
+    def _send_batches(self, planets, token_ids, metadata_uris, owner_address, wait, workers):
+        """Build and sign one mintBatch transaction per chunk of planets concurrently, then pipeline the sends"""
+        owner_address = self.w3.to_checksum_address(owner_address)
+        # Read once per call instead of once per transaction
+        chain_id = self.w3.eth.chain_id
+        gas_price = self.w3.eth.gas_price
         
-        return {
-            'success': True,
-            'token_id': token_id,
-            'tx_hash': tx_hash,
-            'metadata': metadata,
-            'metadata_uri': metadata_uri,
-            'contract_address': '0xSpaceTokensNFT...',
-            'network': 'Filecoin Calibration Testnet'
-        }
+        chunks = [range(start, min(start + self.batch_size, len(planets)))
+                  for start in range(0, len(planets), self.batch_size)]
+        # Nonces are reserved in order up front, so the transactions don't wait on each other
+        nonces = [self.nonces.next() for _ in chunks]
+        
+        def sign(chunk, nonce):
+            requests = [
+                (
+                    planets[i]['name'],
+                    planets[i].get('host_star', ''),
+                    metadata_uris[i],
+                    int(round(planets[i].get('habitability_score', 0))),
+                    self.funding_goal(token_ids[i]),
+                    planets[i].get('rarity', '')
+                )
+                for i in chunk
+            ]
+            call = self.contract.functions.mintBatch(owner_address, requests)
+            # Estimated without the nonce: earlier transactions of the batch may not be mined yet
+            gas = call.estimate_gas({'from': self.account.address})
+            tx = call.build_transaction({
+                'from': self.account.address,
+                'nonce': nonce,
+                'chainId': chain_id,
+                'gas': gas,
+                'gasPrice': gas_price
+            })
+            return self.account.sign_transaction(tx).rawTransaction
+        
+        def confirm(tx_hash):
+            """Token ids assigned by the contract, in minting order"""
+            from web3.logs import DISCARD
+            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            if receipt['status'] != 1:
+                raise RuntimeError(f"mintBatch reverted: {tx_hash.hex()}")
+            events = self.contract.events.TokenMinted().process_receipt(receipt, errors=DISCARD)
+            return [event['args']['tokenId'] for event in events]
+        
+        tx_hashes = [None] * len(planets)
+        errors = [None] * len(planets)
+        minted_ids = [None] * len(planets)
+        
+        def fail(chunk, error):
+            print(f"❌ mintBatch failed: {error}")
+            metrics.upstream_error('rpc')
+            for i in chunk:
+                tx_hashes[i] = None
+                errors[i] = str(error)
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Gas estimation and signing run concurrently; sending is one quick call per
+            # transaction, in nonce order, without waiting for the previous one to be mined
+            signed = [pool.submit(sign, chunk, nonce) for chunk, nonce in zip(chunks, nonces)]
+            sent = []
+            for chunk, future in zip(chunks, signed):
+                try:
+                    tx_hash = self.w3.eth.send_raw_transaction(future.result())
+                except Exception as e:
+                    # Every later nonce now has a gap: fail the rest and re-read the count next time
+                    self.nonces.reset()
+                    for rest in chunks[len(sent):]:
+                        fail(rest, e)
+                    break
+                sent.append((chunk, tx_hash))
+                for i in chunk:
+                    tx_hashes[i] = tx_hash.hex()
+            
+            if wait:
+                receipts = [(chunk, pool.submit(confirm, tx_hash)) for chunk, tx_hash in sent]
+                for chunk, future in receipts:
+                    try:
+                        chunk_ids = future.result()
+                        if len(chunk_ids) != len(chunk):
+                            raise RuntimeError(f"expected {len(chunk)} TokenMinted events, got {len(chunk_ids)}")
+                    except Exception as e:
+                        fail(chunk, e)
+                        continue
+                    for i, token_id in zip(chunk, chunk_ids):
+                        minted_ids[i] = token_id
+        return tx_hashes, errors, minted_ids
     
     def store_on_ipfs(self, metadata):
         """Store metadata on IPFS (simulation)"""
@@ -69,24 +263,88 @@ class FilecoinNFTMinter:
 class SpaceTokenContract:
     """Smart contract interface for Space Tokens"""
     
+    MINT_REQUEST = [
+        {"name": "planetName", "type": "string"},
+        {"name": "hostStar", "type": "string"},
+        {"name": "uri", "type": "string"},
+        {"name": "habitabilityScore", "type": "uint256"},
+        {"name": "fundingGoal", "type": "uint256"},
+        {"name": "rarity", "type": "string"}
+    ]
+    
     ABI = [
         {
             "inputs": [
                 {"name": "to", "type": "address"},
-                {"name": "tokenId", "type": "uint256"},
-                {"name": "uri", "type": "string"}
+                {"name": "planetName", "type": "string"},
+                {"name": "hostStar", "type": "string"},
+                {"name": "uri", "type": "string"},
+                {"name": "habitabilityScore", "type": "uint256"},
+                {"name": "fundingGoal", "type": "uint256"},
+                {"name": "rarity", "type": "string"}
             ],
             "name": "mint",
-            "outputs": [],
+            "outputs": [{"name": "", "type": "uint256"}],
+            "stateMutability": "nonpayable",
+            "type": "function"
+        },
+        {
+            "inputs": [
+                {"name": "to", "type": "address"},
+                {"name": "requests", "type": "tuple[]", "components": MINT_REQUEST}
+            ],
+            "name": "mintBatch",
+            "outputs": [{"name": "tokenIds", "type": "uint256[]"}],
             "stateMutability": "nonpayable",
             "type": "function"
         },
+        {
+            "inputs": [{"name": "tokenId", "type": "uint256"}],
+            "name": "fundResearch",
+            "outputs": [],
+            "stateMutability": "payable",
+            "type": "function"
+        },
+        {
+            "inputs": [{"name": "", "type": "uint256"}],
+            "name": "exoplanets",
+            "outputs": [
+                {"name": "planetName", "type": "string"},
+                {"name": "hostStar", "type": "string"},
+                {"name": "habitabilityScore", "type": "uint256"},
+                {"name": "fundingGoal", "type": "uint256"},
+                {"name": "currentFunding", "type": "uint256"},
+                {"name": "rarity", "type": "string"}
+            ],
+            "stateMutability": "view",
+            "type": "function"
+        },
         {
             "inputs": [{"name": "tokenId", "type": "uint256"}],
             "name": "tokenURI",
             "outputs": [{"name": "", "type": "string"}],
             "stateMutability": "view",
             "type": "function"
+        },
+        {
+            "anonymous": False,
+            "inputs": [
+                {"indexed": True, "name": "tokenId", "type": "uint256"},
+                {"indexed": False, "name": "planetName", "type": "string"},
+                {"indexed": False, "name": "habitabilityScore", "type": "uint256"}
+            ],
+            "name": "TokenMinted",
+            "type": "event"
+        },
+        {
+            "anonymous": False,
+            "inputs": [
+                {"indexed": True, "name": "tokenId", "type": "uint256"},
+                {"indexed": False, "name": "funder", "type": "address"},
+                {"indexed": False, "name": "amount", "type": "uint256"}
+            ],
+            "name": "FundingReceived",
+            "type": "event"
         }
     ]
     